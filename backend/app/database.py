@@ -1,16 +1,62 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # Lee la variable de entorno DATABASE_URL
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# 🏊 Pool compartido: la API y el dashboard (DASHBOARD_BACKEND=postgres) toman conexiones de aquí
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+def opciones_pool(url):
+    # SQLite (pruebas locales) usa su propio pool
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
 # Crea el motor de conexión
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **opciones_pool(DATABASE_URL))
 
 # Configura la sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ===============================
+# ⚡ Motor asíncrono para los handlers de la API (no bloquea el event loop)
+# ===============================
+DRIVERS_ASYNC = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Misma base que DATABASE_URL con driver async (DATABASE_ASYNC_URL lo reemplaza si hace falta)
+def url_async(url):
+    url = make_url(url)
+    url = url.set(drivername=DRIVERS_ASYNC.get(url.get_backend_name(), url.drivername))
+    if url.drivername == "postgresql+asyncpg" and "sslmode" in url.query:
+        # asyncpg no entiende sslmode: lo recibe como ssl
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url
+
+DATABASE_ASYNC_URL = os.getenv("DATABASE_ASYNC_URL") or url_async(DATABASE_URL)
+
+async_engine = create_async_engine(DATABASE_ASYNC_URL, **opciones_pool(str(DATABASE_ASYNC_URL)))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+# Dependencia de FastAPI: una sesión del pool por request, devuelta al terminar
+async def get_session():
+    async with AsyncSessionLocal() as session:
+        yield session
+
 # Base para los modelos
 Base = declarative_base()
@@ -1,13 +1,22 @@
+import os
 from fastapi import FastAPI
-from etl.pipeline import procesar_parquet_por_chunks
+from app.routes import health, fondos, series, etl as etl_routes
+from etl.worker import asegurar_tabla_jobs, lanzar_en_segundo_plano
 
 app = FastAPI()
 
+app.include_router(health.router, prefix="/health")
+app.include_router(fondos.router, prefix="/fondos")
+app.include_router(series.router, prefix="/series")
+app.include_router(etl_routes.router, prefix="/etl")
+
 @app.on_event("startup")
 async def startup_event():
-    ruta_parquet = "/app/data_fuentes/ffmm_merged.parquet"
-    tabla_destino = "fondos_mutuos"
-    procesar_parquet_por_chunks(ruta_parquet, tabla_destino)
+    # etl_jobs se asegura una vez acá y no en cada GET /etl/status
+    asegurar_tabla_jobs()
+    # La carga corre en un proceso aparte (etl/worker.py); el avance se consulta en /etl/status
+    if os.getenv("ETL_EN_STARTUP", "1") == "1":
+        lanzar_en_segundo_plano()
 
 @app.get("/")
 async def root():
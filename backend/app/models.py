@@ -1,9 +1,6 @@
-# Aquí definirás tus modelos de SQLAlchemy para las tablas
-from sqlalchemy import Column, Integer, String
+# Modelos de SQLAlchemy: el esquema de fondos_mutuos vive en etl/esquema.py (lo usa también el pipeline)
 from app.database import Base
+from etl.esquema import tabla_fondos_mutuos
 
 class FondoMutuo(Base):
-    __tablename__ = "fondos_mutuos"
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String, nullable=False)
-    categoria = Column(String, nullable=False)
\ No newline at end of file
+    __table__ = tabla_fondos_mutuos
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+from etl.worker import ultimo_job, describir_job
+
+router = APIRouter()
+
+@router.get("/status")
+def etl_status():
+    return describir_job(ultimo_job())
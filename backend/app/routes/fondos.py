@@ -1,7 +1,64 @@
-from fastapi import APIRouter
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal, get_session
+from app.services.fondos_service import (LIMITE_DEFECTO, LIMITE_MAX, calcular_etag, decodificar_cursor,
+                                         etag_coincide, listar_fondos, lotes_fondos, normalizar_filtros,
+                                         serializar, version_datos)
+from app.services.formatos import CUERPOS, TIPOS_MEDIA, esquema_arrow, negociar_formato
+from etl.esquema import tabla_fondos_mutuos
 
 router = APIRouter()
 
+# Filtros comunes a los endpoints de datos (repetibles: ?nom_adm=BCI&nom_adm=SURA)
+def filtros_consulta(
+    categoria: Optional[List[str]] = Query(None),
+    categoria_agrupada: Optional[List[str]] = Query(None),
+    nom_adm: Optional[List[str]] = Query(None),
+    tipo_fm: Optional[List[str]] = Query(None),
+    serie: Optional[List[str]] = Query(None),
+    run_fm: Optional[List[int]] = Query(None),
+):
+    return normalizar_filtros({
+        "categoria": categoria, "categoria_agrupada": categoria_agrupada, "nom_adm": nom_adm,
+        "tipo_fm": tipo_fm, "serie": serie, "run_fm": run_fm,
+    })
+
 @router.get("/")
-def get_fondos():
-    return {"fondos": []}
+async def get_fondos(
+    filtros: dict = Depends(filtros_consulta),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limite: int = Query(LIMITE_DEFECTO, ge=1, le=LIMITE_MAX),
+    formato: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_session),
+):
+    try:
+        clave_cursor = decodificar_cursor(cursor) if cursor else None
+        formato = negociar_formato(accept, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # El ETag sale de la versión de carga + parámetros: si no hubo carga nueva, no se consulta la tabla
+    etag = calcular_etag(await version_datos(session), filtros, desde, hasta, cursor, limite, formato)
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_coincide(if_none_match, etag):
+        return Response(status_code=304, headers=cabeceras)
+
+    if formato in CUERPOS:
+        # Columnar: sin paginar, lote a lote desde la consulta hasta el cliente
+        if formato == "parquet":
+            cabeceras["Content-Disposition"] = 'attachment; filename="fondos.parquet"'
+        lotes = lotes_fondos(AsyncSessionLocal, filtros, desde, hasta, clave_cursor)
+        cuerpo = CUERPOS[formato](lotes, esquema_arrow(tabla_fondos_mutuos))
+        return StreamingResponse(cuerpo, media_type=TIPOS_MEDIA[formato], headers=cabeceras)
+
+    fondos, siguiente = await listar_fondos(session, filtros, desde, hasta, clave_cursor, limite)
+
+    contenido = serializar({"fondos": fondos, "siguiente": siguiente, "limite": limite})
+    return Response(content=contenido, media_type="application/json", headers=cabeceras)
@@ -0,0 +1,29 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_session
+from app.routes.fondos import filtros_consulta
+from app.services.series_service import ACUMULABLES, MEDIDAS, crear_cache, obtener_serie
+
+router = APIRouter()
+
+# Una caché por proceso de la API; se vacía sola cuando el ETL registra una carga nueva
+cache_series = crear_cache()
+
+@router.get("/{medida}")
+async def get_serie(
+    medida: str,
+    filtros: dict = Depends(filtros_consulta),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    acumulado: bool = False,
+    session: AsyncSession = Depends(get_session),
+):
+    if medida not in MEDIDAS:
+        raise HTTPException(status_code=404, detail=f"Serie desconocida: {medida}. Opciones: {list(MEDIDAS)}")
+    if acumulado and medida not in ACUMULABLES:
+        raise HTTPException(status_code=400, detail=f"La serie {medida} no admite acumulado")
+    contenido, en_cache = await obtener_serie(cache_series, session, medida, filtros, desde, hasta, acumulado)
+    return Response(content=contenido, media_type="application/json",
+                    headers={"X-Cache": "HIT" if en_cache else "MISS"})
@@ -0,0 +1,52 @@
+# Caché en memoria del proceso: LRU con vencimiento y atada a la versión de carga del ETL
+import time
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    def __init__(self, max_entradas=512, ttl=3600, intervalo_version=10):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.intervalo_version = intervalo_version
+        self.version = None
+        self._revisada_en = None
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                return None
+            valor, vence = item
+            if vence < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    # La versión se vuelve a leer a lo sumo cada intervalo_version segundos
+    def version_vencida(self):
+        return self._revisada_en is None or time.monotonic() - self._revisada_en >= self.intervalo_version
+
+    # Si cambió la versión, todo lo guardado quedó viejo
+    def fijar_version(self, version):
+        with self._lock:
+            if version != self.version:
+                self._datos.clear()
+                self.version = version
+            self._revisada_en = time.monotonic()
+
+    def __len__(self):
+        return len(self._datos)
@@ -1 +1,99 @@
-# Aquí irá la lógica para procesar datos de FFMM
+# Lógica de consulta de fondos_mutuos para la API
+import base64
+import hashlib
+from datetime import date
+import orjson
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from etl.esquema import tabla_fondos_mutuos
+from app.services.formatos import esquema_arrow, lote_arrow
+
+# ===============================
+# 🔎 Filtros (mismas columnas que el dashboard)
+# ===============================
+COLUMNAS_FILTRO = ["categoria", "categoria_agrupada", "nom_adm", "tipo_fm", "serie", "run_fm"]
+# Orden de paginación: también es la clave del cursor
+ORDEN = ["fecha_inf", "run_fm", "serie"]
+LIMITE_DEFECTO = 1000
+LIMITE_MAX = 10000
+# Arrow/Parquet no se paginan: se entrega todo el resultado en lotes de este tamaño
+FILAS_POR_LOTE = 50_000
+
+# Filtros canónicos: sin vacíos, valores únicos y ordenados → misma consulta, mismo ETag
+def normalizar_filtros(filtros):
+    return {col: sorted(set(valores)) for col, valores in sorted(filtros.items()) if valores}
+
+# ===============================
+# 🏷️ Versión de los datos (última carga del ETL)
+# ===============================
+async def version_datos(session, tabla="fondos_mutuos"):
+    try:
+        resultado = await session.execute(
+            text("SELECT MAX(id), MAX(cargado_en) FROM etl_cargas WHERE tabla = :t"), {"t": tabla}
+        )
+        fila = resultado.one()
+    except SQLAlchemyError:
+        await session.rollback()
+        return "sin_cargas"
+    return f"{fila[0]}:{fila[1]}"
+
+def calcular_etag(version, *partes):
+    contenido = orjson.dumps([version, *partes], option=orjson.OPT_SORT_KEYS)
+    return f'"{hashlib.sha1(contenido).hexdigest()}"'
+
+def etag_coincide(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidatos = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return "*" in candidatos or etag in candidatos
+
+# ===============================
+# 📑 Cursor opaco (fecha_inf, run_fm, serie) de la última fila entregada
+# ===============================
+def codificar_cursor(fila):
+    clave = [fila["fecha_inf"].isoformat(), fila["run_fm"], fila["serie"]]
+    return base64.urlsafe_b64encode(orjson.dumps(clave)).decode("ascii").rstrip("=")
+
+def decodificar_cursor(cursor):
+    try:
+        fecha, run_fm, serie = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return date.fromisoformat(fecha), int(run_fm), str(serie)
+    except (ValueError, TypeError, orjson.JSONDecodeError):
+        raise ValueError("Cursor inválido")
+
+# ===============================
+# 📄 Página de fondos (keyset: sin OFFSET, cada página parte donde terminó la anterior)
+# ===============================
+def consulta_fondos(filtros, desde=None, hasta=None, cursor=None, limite=LIMITE_DEFECTO):
+    tabla = tabla_fondos_mutuos
+    consulta = select(tabla)
+    for col, valores in filtros.items():
+        consulta = consulta.where(tabla.c[col].in_(valores))
+    if desde is not None:
+        consulta = consulta.where(tabla.c.fecha_inf >= desde)
+    if hasta is not None:
+        consulta = consulta.where(tabla.c.fecha_inf <= hasta)
+    if cursor is not None:
+        consulta = consulta.where(tuple_(*(tabla.c[c] for c in ORDEN)) > tuple_(*cursor))
+    consulta = consulta.order_by(*(tabla.c[c] for c in ORDEN))
+    return consulta if limite is None else consulta.limit(limite)
+
+async def listar_fondos(session, filtros, desde=None, hasta=None, cursor=None, limite=LIMITE_DEFECTO):
+    # Se pide una fila de más para saber si hay página siguiente sin un COUNT aparte
+    resultado = await session.execute(consulta_fondos(filtros, desde, hasta, cursor, limite + 1))
+    filas = resultado.mappings().all()
+    siguiente = codificar_cursor(filas[limite - 1]) if len(filas) > limite else None
+    return [dict(f) for f in filas[:limite]], siguiente
+
+# Cursor del lado del servidor: en memoria vive un lote a la vez. La sesión es propia porque
+# el cuerpo se sigue leyendo después de que el handler devolvió la respuesta
+async def lotes_fondos(crear_sesion, filtros, desde=None, hasta=None, cursor=None, tamano=FILAS_POR_LOTE):
+    esquema = esquema_arrow(tabla_fondos_mutuos)
+    consulta = consulta_fondos(filtros, desde, hasta, cursor, None).execution_options(yield_per=tamano)
+    async with crear_sesion() as session:
+        resultado = await session.stream(consulta)
+        async for filas in resultado.partitions(tamano):
+            yield lote_arrow(filas, esquema)
+
+def serializar(contenido):
+    return orjson.dumps(contenido, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,104 @@
+# Formatos columnares para consumidores masivos (notebooks, otros servicios)
+import io
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import BigInteger, Date, Float, Integer
+
+# ===============================
+# 🤝 Negociación de contenido
+# ===============================
+TIPOS_MEDIA = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+ALIAS_MEDIA = {
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/json": "json",
+}
+
+# Rangos comodín: el formato por defecto los satisface
+COMODINES = {"*/*", "application/*"}
+
+def calidad(parametros):
+    for parametro in parametros:
+        nombre, _, valor = parametro.partition("=")
+        if nombre.strip() == "q":
+            try:
+                return min(max(float(valor), 0.0), 1.0)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+# ?formato= gana (pd.read_parquet(url) no manda Accept); si no, el tipo del Accept con mayor q.
+# A igual q gana un tipo explícito sobre un comodín, y entre explícitos el que aparece primero
+def negociar_formato(accept=None, formato=None):
+    if formato:
+        if formato not in TIPOS_MEDIA:
+            raise ValueError(f"Formato desconocido: {formato}. Opciones: {list(TIPOS_MEDIA)}")
+        return formato
+    elegido, mejor = "json", (0.0, 0)
+    for parte in (accept or "").split(","):
+        tipo, *parametros = [p.strip().lower() for p in parte.split(";")]
+        if tipo in ALIAS_MEDIA:
+            candidato, prioridad = ALIAS_MEDIA[tipo], (calidad(parametros), 1)
+        elif tipo in COMODINES:
+            candidato, prioridad = "json", (calidad(parametros), 0)
+        else:
+            continue
+        if prioridad[0] > 0 and prioridad > mejor:
+            elegido, mejor = candidato, prioridad
+    return elegido
+
+# ===============================
+# 🏹 Filas de la consulta → RecordBatch, sin pasar por pandas
+# ===============================
+def tipo_arrow(tipo_sql):
+    if isinstance(tipo_sql, Date):
+        return pa.date32()
+    if isinstance(tipo_sql, BigInteger):
+        return pa.int64()
+    if isinstance(tipo_sql, Integer):
+        return pa.int32()
+    if isinstance(tipo_sql, Float):
+        return pa.float64()
+    return pa.string()
+
+def esquema_arrow(tabla):
+    return pa.schema([(c.name, tipo_arrow(c.type)) for c in tabla.columns])
+
+def lote_arrow(filas, esquema):
+    columnas = list(zip(*filas)) if filas else [[] for _ in esquema]
+    return pa.RecordBatch.from_arrays(
+        [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)], schema=esquema
+    )
+
+# ===============================
+# 🌊 Cuerpo de la respuesta: se entrega cada lote apenas se escribe
+# ===============================
+def _vaciar(sink):
+    datos = sink.getvalue()
+    sink.seek(0)
+    sink.truncate(0)
+    return datos
+
+async def cuerpo_arrow(lotes, esquema):
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, esquema) as escritor:
+        async for lote in lotes:
+            escritor.write_batch(lote)
+            yield _vaciar(sink)
+    yield _vaciar(sink)
+
+# Cada lote es un row group; el footer sale al final
+async def cuerpo_parquet(lotes, esquema):
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, esquema, compression="zstd") as escritor:
+        async for lote in lotes:
+            escritor.write_batch(lote)
+            yield _vaciar(sink)
+    yield _vaciar(sink)
+
+CUERPOS = {"arrow": cuerpo_arrow, "parquet": cuerpo_parquet}
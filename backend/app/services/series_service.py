@@ -0,0 +1,79 @@
+# Series diarias agregadas (las mismas que dibuja el dashboard)
+import os
+from itertools import accumulate
+from sqlalchemy import column, func, inspect, select, table
+from etl.rollups import DIMENSIONES_DIARIO, nombre_rollup_diario
+from app.services.cache import CacheLRU
+from app.services.fondos_service import serializar, version_datos
+
+# ===============================
+# 📈 Medidas disponibles en /series/{medida}
+# ===============================
+TABLA = "fondos_mutuos"
+MEDIDAS = {
+    "patrimonio": "patrimonio_neto_mm",
+    "venta_neta": "venta_neta_mm",
+    "aportes": "aportes_mm",
+    "rescates": "rescates_mm",
+}
+# El patrimonio es un saldo: acumularlo no tiene sentido
+ACUMULABLES = {"venta_neta", "aportes", "rescates"}
+
+SERIES_CACHE_ENTRADAS = int(os.getenv("SERIES_CACHE_ENTRADAS", "512"))
+SERIES_CACHE_TTL = int(os.getenv("SERIES_CACHE_TTL", "3600"))
+SERIES_VERSION_TTL = float(os.getenv("SERIES_VERSION_TTL", "10"))
+
+def crear_cache():
+    return CacheLRU(SERIES_CACHE_ENTRADAS, SERIES_CACHE_TTL, SERIES_VERSION_TTL)
+
+def clave_serie(medida, filtros, desde, hasta, acumulado):
+    return medida, bool(acumulado), tuple((col, tuple(v)) for col, v in filtros.items()), desde, hasta
+
+# ===============================
+# 🧮 Agregación en la base
+# ===============================
+# Si los filtros sólo tocan dimensiones del rollup diario, se suma sobre él (mucho más chico).
+# El catálogo sólo cambia con una carga del ETL: se guarda en la caché con la versión de etl_cargas
+async def tabla_origen(cache, session, filtros):
+    rollup = nombre_rollup_diario(TABLA)
+    if not all(col in DIMENSIONES_DIARIO for col in filtros):
+        return TABLA
+    clave = ("tablas", cache.version)
+    tablas = cache.obtener(clave)
+    if tablas is None:
+        conn = await session.connection()
+        tablas = frozenset(await conn.run_sync(lambda c: inspect(c).get_table_names()))
+        cache.guardar(clave, tablas)
+    return rollup if rollup in tablas else TABLA
+
+def consulta_serie(tabla, columna, filtros, desde=None, hasta=None):
+    t = table(tabla, column("fecha_inf"), column(columna), *(column(c) for c in filtros))
+    consulta = select(t.c.fecha_inf, func.sum(t.c[columna]).label("valor"))
+    for col, valores in filtros.items():
+        consulta = consulta.where(t.c[col].in_(valores))
+    if desde is not None:
+        consulta = consulta.where(t.c.fecha_inf >= desde)
+    if hasta is not None:
+        consulta = consulta.where(t.c.fecha_inf <= hasta)
+    return consulta.group_by(t.c.fecha_inf).order_by(t.c.fecha_inf)
+
+async def calcular_serie(cache, session, medida, filtros, desde=None, hasta=None, acumulado=False):
+    consulta = consulta_serie(await tabla_origen(cache, session, filtros), MEDIDAS[medida], filtros, desde, hasta)
+    filas = (await session.execute(consulta)).all()
+    fechas = [f[0] for f in filas]
+    valores = [float(f[1] or 0.0) for f in filas]
+    if acumulado:
+        valores = list(accumulate(valores))
+    return {"medida": medida, "acumulado": bool(acumulado), "fechas": fechas, "valores": valores}
+
+# Devuelve el JSON ya serializado: un acierto de caché no vuelve a pasar por orjson
+async def obtener_serie(cache, session, medida, filtros, desde=None, hasta=None, acumulado=False):
+    if cache.version_vencida():
+        cache.fijar_version(await version_datos(session, TABLA))
+    clave = clave_serie(medida, filtros, desde, hasta, acumulado)
+    contenido = cache.obtener(clave)
+    if contenido is not None:
+        return contenido, True
+    contenido = serializar(await calcular_serie(cache, session, medida, filtros, desde, hasta, acumulado))
+    cache.guardar(clave, contenido)
+    return contenido, False
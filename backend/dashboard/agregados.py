@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import COLUMNAS_MM, indice_fechas
+
+# ===============================
+# 🧊 Cubo diario por estado de filtros
+# ===============================
+# Inicio de cada día dentro de las filas seleccionadas (la base está ordenada por fecha)
+def dias_de_filas(base, filas):
+    dias, offsets = indice_fechas(base)
+    if filas is None:
+        return dias, offsets[:-1]
+    if isinstance(filas, slice):
+        i, j = np.searchsorted(offsets, [filas.start, filas.stop])
+        return dias[i:j], offsets[i:j] - filas.start
+    fechas = base["fecha_dia"].to_numpy()[filas]
+    inicios = np.flatnonzero(np.concatenate([[len(fechas) > 0], fechas[1:] != fechas[:-1]]))
+    return fechas[inicios], inicios
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cubo_diario(_base, _filas, firma, clave):
+    dias, inicios = dias_de_filas(_base, _filas)
+    columnas = [c for c in COLUMNAS_MM if c in _base.columns]
+    sumas = {}
+    for col in columnas:
+        valores = _base[col].to_numpy()
+        valores = valores if _filas is None else valores[_filas]
+        if np.isnan(valores).any():
+            valores = np.nan_to_num(valores)
+        # Suma por tramo de día en float64 (las medidas de un solo signo vienen en float32)
+        sumas[col] = np.add.reduceat(valores, inicios, dtype=np.float64) if len(inicios) else np.array([])
+    return pd.DataFrame(sumas, index=pd.DatetimeIndex(dias, name="fecha_dia"))
+
+# Una pasada por estado de filtros; las páginas lo comparten vía la caché
+def cubo_diario(base, filas, clave):
+    return _cubo_diario(base, filas, base.attrs.get("firma"), clave)
+
+# ===============================
+# 📉 Resolución de los gráficos (presupuesto de puntos)
+# ===============================
+PUNTOS_MAX = int(os.getenv("DASHBOARD_PUNTOS_MAX", "400"))
+
+RESOLUCIONES = [("D", "diaria"), ("W", "semanal"), ("ME", "mensual")]
+
+# LTTB (Largest-Triangle-Three-Buckets): conserva la forma de la serie con `umbral` puntos
+def lttb(serie, umbral):
+    n = len(serie)
+    if umbral >= n or umbral < 3:
+        return serie
+    x = serie.index.asi8.astype(np.float64)
+    y = serie.to_numpy(dtype=np.float64)
+    elegidos = [0]
+    limites = np.linspace(1, n - 1, umbral - 1).astype(int)
+    a = 0
+    for i in range(umbral - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        siguiente = slice(limites[i + 1], limites[i + 2] if i + 2 < umbral - 1 else n)
+        x_prom, y_prom = x[siguiente].mean(), y[siguiente].mean()
+        areas = np.abs((x[a] - x_prom) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (y_prom - y[a]))
+        a = inicio + int(np.argmax(areas))
+        elegidos.append(a)
+    elegidos.append(n - 1)
+    return serie.iloc[elegidos]
+
+# modo: "suma" (flujos por período), "ultimo" (saldos y acumulados: valor al cierre del período)
+def reducir_serie(serie, modo="suma", presupuesto=PUNTOS_MAX):
+    if serie.empty:
+        return serie, "diaria"
+    dias = (serie.index[-1] - serie.index[0]).days + 1
+    for regla, nombre in RESOLUCIONES:
+        puntos = {"D": dias, "W": dias / 7, "ME": dias / 30.4}[regla]
+        if puntos <= presupuesto or regla == "ME":
+            break
+    if regla != "D":
+        agrupada = serie.resample(regla)
+        serie = (agrupada.sum() if modo == "suma" else agrupada.last()).dropna()
+    if len(serie) > presupuesto:
+        serie, nombre = lttb(serie, presupuesto), f"{nombre} (LTTB)"
+    return serie, nombre
+
+# Serie lista para graficar: agrupada según el rango y con a lo más `presupuesto` puntos
+@st.cache_resource(max_entries=64, show_spinner=False)
+def serie_grafico(_cubo, firma, clave, columna, modo="suma", acumular=False, presupuesto=PUNTOS_MAX):
+    serie = _cubo[columna].cumsum() if acumular else _cubo[columna]
+    return reducir_serie(serie, modo, presupuesto)
+
+# ===============================
+# 🏆 Ranking de fondos por venta neta (top-k)
+# ===============================
+COLUMNAS_FONDO = ["run_fm", "nombre_corto", "nom_adm"]
+
+# Código entero por fondo (run_fm, nombre, administradora), una vez por base
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _codigos_fondo(_base, firma):
+    codigos = _base.groupby(COLUMNAS_FONDO, observed=True, sort=False).ngroup().to_numpy().astype(np.int32)
+    unicos, primeras = np.unique(codigos, return_index=True)
+    primeras = primeras[unicos >= 0]
+    catalogo = _base[COLUMNAS_FONDO].iloc[primeras].reset_index(drop=True)
+    return codigos, catalogo
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _ranking(_base, _filas, firma, clave, k):
+    codigos, catalogo = _codigos_fondo(_base, firma)
+    venta = _base["venta_neta_mm"].to_numpy()
+    if _filas is not None:
+        codigos, venta = codigos[_filas], venta[_filas]
+    validos = codigos >= 0
+    codigos, venta = codigos[validos], np.nan_to_num(venta[validos])
+
+    sumas = np.bincount(codigos, weights=venta, minlength=len(catalogo))
+    presentes = np.flatnonzero(np.bincount(codigos, minlength=len(catalogo)))
+    total_fondos = len(presentes)
+    # Selección parcial: sólo se ordenan los k mayores
+    if total_fondos > k:
+        presentes = presentes[np.argpartition(-sumas[presentes], k - 1)[:k]]
+    orden = presentes[np.argsort(-sumas[presentes], kind="stable")]
+
+    top = catalogo.iloc[orden].reset_index(drop=True)
+    top["venta_neta_mm"] = sumas[orden]
+    return top, total_fondos
+
+# Top-k y total de fondos con datos
+def ranking(base, filas, clave, k=20):
+    return _ranking(base, filas, base.attrs.get("firma"), clave, k)
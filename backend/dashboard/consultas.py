@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from datos import COLUMNAS_MM
+from filtros import COLUMNAS_FILTRO
+
+# ===============================
+# 🧾 SQL parametrizado a partir de la clave de filtros
+# ===============================
+# marcador: cómo escribe cada motor un parámetro con nombre ($x en DuckDB, :x en SQLAlchemy)
+def condicion_filtros(filtros, marcador):
+    partes, params = [], {}
+    for col, valores in filtros:
+        # Los nombres de columna van en el SQL: sólo se aceptan los conocidos
+        if col not in COLUMNAS_FILTRO:
+            raise ValueError(f"Columna de filtro no permitida: {col}")
+        if not valores:
+            partes.append("FALSE")
+            continue
+        nombres = [f"{col}_{i}" for i in range(len(valores))]
+        partes.append(f"{col} IN ({', '.join(marcador(n) for n in nombres)})")
+        params.update(zip(nombres, valores))
+    return partes, params
+
+def condicion(clave, marcador, fecha="fecha_dia"):
+    filtros, (desde, hasta) = clave
+    partes, params = condicion_filtros(filtros, marcador)
+    partes.insert(0, f"{fecha} BETWEEN {marcador('desde')} AND {marcador('hasta')}")
+    params.update(desde=desde.date(), hasta=hasta.date())
+    return " AND ".join(partes), params
+
+def sql_contar(tabla, where):
+    return f"SELECT COUNT(*) FROM {tabla} WHERE {where}"
+
+def sql_opciones(tabla, columna):
+    return f"SELECT DISTINCT {columna} FROM {tabla} WHERE {columna} IS NOT NULL ORDER BY 1"
+
+def sql_cubo(tabla, where, fecha="fecha_dia"):
+    sumas = ", ".join(f"SUM({c}) AS {c}" for c in COLUMNAS_MM)
+    return f"SELECT {fecha} AS fecha_dia, {sumas} FROM {tabla} WHERE {where} GROUP BY 1 ORDER BY 1"
+
+# COUNT(*) OVER () se evalúa antes del LIMIT: total de fondos con datos en la misma consulta
+def sql_ranking(tabla, where, k):
+    return (
+        "SELECT run_fm, nombre_corto, nom_adm, SUM(COALESCE(venta_neta_mm, 0)) AS venta_neta_mm, "
+        "COUNT(*) OVER () AS total_fondos "
+        f"FROM {tabla} WHERE {where} "
+        "AND run_fm IS NOT NULL AND nombre_corto IS NOT NULL AND nom_adm IS NOT NULL "
+        "GROUP BY run_fm, nombre_corto, nom_adm "
+        f"ORDER BY venta_neta_mm DESC LIMIT {int(k)}"
+    )
+
+def separar_total(resultado):
+    total = int(resultado["total_fondos"].iloc[0]) if len(resultado) else 0
+    return resultado.drop(columns="total_fondos"), total
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+import unicodedata
+from datetime import date, timedelta
+import streamlit as st
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+
+# ===============================
+# 📂 Rutas y columnas necesarias
+# ===============================
+DATA_DIR = os.getenv("FFMM_DATA_DIR", "/app/data_fuentes")
+PARQUET_PATH = os.path.join(DATA_DIR, "ffmm_merged.parquet")
+# Dataset particionado anio=/mes= que escribe etl/dataset.py (si existe, se prefiere)
+DATASET_PATH = os.path.join(DATA_DIR, "ffmm_dataset")
+
+COLUMNAS_NECESARIAS = [
+    "fecha_inf_date", "fecha_inf", "run_fm", "nombre_corto", "run_fm_nombrecorto",
+    "nom_adm", "patrimonio_neto_mm", "venta_neta_mm", "aportes_mm", "rescates_mm",
+    "tipo_fm", "categoria", "categoria_agrupada", "serie"
+]
+
+# Columnas de texto que se leen como diccionario (llegan a pandas como category)
+COLUMNAS_CATEGORICAS = [
+    "categoria", "categoria_agrupada", "nom_adm", "tipo_fm", "serie",
+    "nombre_corto", "run_fm_nombrecorto"
+]
+COLUMNAS_MM = ["patrimonio_neto_mm", "venta_neta_mm", "aportes_mm", "rescates_mm"]
+# Error relativo máximo de las sumas del cubo frente a sumar el origen en float64
+RTOL_SUMAS = 1e-6
+
+def limpiar_nombre(col):
+    col = unicodedata.normalize('NFKD', col).encode('ascii', 'ignore').decode('ascii')
+    col = ''.join(c if c.isalnum() else '_' for c in col)
+    return col.lower()
+
+# ===============================
+# 🗂️ Dataset pyarrow (particionado o archivo único)
+# ===============================
+def abrir_dataset(columnas_diccionario=()):
+    formato = ds.ParquetFileFormat(
+        read_options=ds.ParquetReadOptions(dictionary_columns=list(columnas_diccionario))
+    )
+    if os.path.isdir(DATASET_PATH):
+        return ds.dataset(DATASET_PATH, format=formato, partitioning="hive")
+    return ds.dataset(PARQUET_PATH, format=formato)
+
+# Nombre real en el archivo de cada columna "limpia" (el parquet legado trae nombres sin normalizar)
+def nombres_originales(dataset):
+    return {limpiar_nombre(c): c for c in dataset.schema.names}
+
+def campo_fecha(originales):
+    return originales.get("fecha_inf_date") or originales["fecha_inf"]
+
+# La firma del dataset es la clave: una carga nueva del ETL da otra firma y el rango se recalcula
+@st.cache_data(max_entries=4, show_spinner=False)
+def rango_disponible(firma: str):
+    dataset = abrir_dataset()
+    fecha = campo_fecha(nombres_originales(dataset))
+    # Min/max desde las estadísticas de los row groups, sin leer datos
+    minimo, maximo = None, None
+    try:
+        for fragmento in dataset.get_fragments():
+            for rg in fragmento.row_groups:
+                stats = rg.statistics[fecha]
+                minimo = stats["min"] if minimo is None else min(minimo, stats["min"])
+                maximo = stats["max"] if maximo is None else max(maximo, stats["max"])
+    except (KeyError, TypeError):
+        minimo = None
+
+    if minimo is None:
+        min_max = pc.min_max(dataset.to_table(columns=[fecha]).column(fecha))
+        minimo, maximo = min_max["min"].as_py(), min_max["max"].as_py()
+    # Dataset sin filas: no hay rango
+    if minimo is None:
+        return None
+    return pd.Timestamp(minimo).date(), pd.Timestamp(maximo).date()
+
+# ===============================
+# 🔽 Filtros empujados al scan (particiones + estadísticas)
+# ===============================
+def expresion_filtro(dataset, desde=None, hasta=None, filtros=None):
+    originales = nombres_originales(dataset)
+    nombre_fecha = campo_fecha(originales)
+    fecha = ds.field(nombre_fecha)
+    expr = None
+
+    tipo_fecha = dataset.schema.field(nombre_fecha).type
+    def valor_fecha(d):
+        if pa.types.is_timestamp(tipo_fecha):
+            return pd.Timestamp(d)
+        if pa.types.is_date(tipo_fecha):
+            return d
+        return d.isoformat()
+
+    def y(a, b):
+        return b if a is None else a & b
+
+    particionado = "anio" in dataset.schema.names and "mes" in dataset.schema.names
+    anio, mes = ds.field("anio"), ds.field("mes")
+    if desde is not None:
+        expr = y(expr, fecha >= valor_fecha(desde))
+        if particionado:
+            expr = y(expr, (anio > desde.year) | ((anio == desde.year) & (mes >= desde.month)))
+    if hasta is not None:
+        # hasta inclusive: todo el día
+        expr = y(expr, fecha < valor_fecha(hasta + timedelta(days=1)))
+        if particionado:
+            expr = y(expr, (anio < hasta.year) | ((anio == hasta.year) & (mes <= hasta.month)))
+    for col, valores in (filtros or {}).items():
+        if valores is None:
+            continue
+        # Selección vacía: ninguna fila (isin([]) no tiene tipo con qué comparar)
+        expr = y(expr, predicado_filtro(originales, col, valores) if valores else ds.scalar(False))
+    return expr
+
+# Un filtro que no se puede resolver es un error: ignorarlo entregaría filas que el usuario no pidió
+def predicado_filtro(originales, col, valores):
+    if col in originales:
+        return ds.field(originales[col]).isin(list(valores))
+    if col == "run_fm_nombrecorto" and "run_fm" in originales and "nombre_corto" in originales:
+        # Columna derivada: se arma igual que en leer_tabla ("RUN - nombre")
+        derivada = pc.binary_join_element_wise(ds.field(originales["run_fm"]).cast(pa.string()),
+                                               ds.field(originales["nombre_corto"]).cast(pa.string()), " - ")
+        return derivada.isin(list(valores))
+    raise ValueError(f"No se puede filtrar por {col}: el dataset no tiene esa columna")
+
+# ===============================
+# 🪶 Tipos livianos
+# ===============================
+# float32 redondea cada monto con error relativo <= 2**-24. Con un solo signo, cualquier suma (acumulada en
+# float64) conserva ese error relativo; con signos mezclados (venta neta) la cancelación lo agranda: queda en float64
+def bajar_a_float32(columna):
+    extremos = pc.min_max(columna)
+    minimo, maximo = extremos["min"].as_py(), extremos["max"].as_py()
+    if minimo is not None and minimo < 0 < maximo:
+        return columna
+    reducida = columna.cast(pa.float32())
+    error = pc.max(pc.abs(pc.subtract(reducida.cast(pa.float64()), columna))).as_py()
+    escala = max(abs(minimo or 0.0), abs(maximo or 0.0))
+    return reducida if error is None or error <= RTOL_SUMAS * escala else columna
+
+# ===============================
+# 📊 Lectura con progreso real (por row group)
+# ===============================
+def leer_tabla(desde: date = None, hasta: date = None, al_progresar=None):
+    originales = nombres_originales(abrir_dataset())
+    columnas = [originales[c] for c in COLUMNAS_NECESARIAS if c in originales]
+    dataset = abrir_dataset([originales[c] for c in COLUMNAS_CATEGORICAS if c in originales])
+    filtro = expresion_filtro(dataset, desde, hasta)
+
+    # Sólo los row groups que sobreviven a particiones y estadísticas
+    row_groups = [
+        rg for fragmento in dataset.get_fragments(filter=filtro)
+        for rg in fragmento.split_by_row_group(filtro, schema=dataset.schema)
+    ]
+    tablas = []
+    for i, rg in enumerate(row_groups, start=1):
+        tablas.append(rg.to_table(columns=columnas, filter=filtro, schema=dataset.schema))
+        if al_progresar:
+            al_progresar(i, len(row_groups))
+
+    if tablas:
+        tabla = pa.concat_tables(tablas).unify_dictionaries()
+    else:
+        tabla = dataset.schema.empty_table().select(columnas)
+    tabla = tabla.rename_columns([limpiar_nombre(c) for c in tabla.column_names])
+
+    # Compatibilidad fecha_inf
+    if "fecha_inf_date" not in tabla.column_names and "fecha_inf" in tabla.column_names:
+        tabla = tabla.rename_columns(["fecha_inf_date" if c == "fecha_inf" else c for c in tabla.column_names])
+    if pa.types.is_date(tabla.schema.field("fecha_inf_date").type):
+        tabla = tabla.set_column(tabla.schema.get_field_index("fecha_inf_date"), "fecha_inf_date",
+                                 tabla["fecha_inf_date"].cast(pa.timestamp("us")))
+
+    if "run_fm_nombrecorto" not in tabla.column_names:
+        if "run_fm" in tabla.column_names and "nombre_corto" in tabla.column_names:
+            nombre = pc.binary_join_element_wise(pc.cast(tabla["run_fm"], pa.string()),
+                                                 pc.cast(tabla["nombre_corto"], pa.string()), " - ")
+            tabla = tabla.append_column("run_fm_nombrecorto", pc.dictionary_encode(nombre))
+
+    for col in COLUMNAS_MM:
+        if col in tabla.column_names:
+            tabla = tabla.set_column(tabla.schema.get_field_index(col), col,
+                                     bajar_a_float32(tabla[col].cast(pa.float64())))
+    return tabla
+
+def a_pandas(tabla):
+    # split_blocks: las columnas numéricas de una tabla mapeada a memoria no se copian
+    df = tabla.to_pandas(split_blocks=True, date_as_object=False)
+    # Fechas como datetime64 (nada de objetos date por fila)
+    dia = df["fecha_inf_date"].dt.normalize()
+    df["fecha_dia"] = df["fecha_inf_date"] if dia.equals(df["fecha_inf_date"]) else dia
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+# ===============================
+# 🧠 Base compartida por proceso (Arrow IPC mapeado a memoria)
+# ===============================
+# Una sola copia por proceso, de sólo lectura: las sesiones sólo guardan su clave de filtros
+CACHE_DIR = os.getenv("FFMM_CACHE_DIR", os.path.join(DATA_DIR, ".cache"))
+# Período que se lee a la base (fechas ISO; vacío = todo el dataset). Es del proceso, no de la sesión:
+# acota la memoria de la base; el período elegido en la página sólo acota las consultas sobre ella
+BASE_DESDE = os.getenv("FFMM_BASE_DESDE")
+BASE_HASTA = os.getenv("FFMM_BASE_HASTA")
+
+def ventana_base():
+    return (date.fromisoformat(BASE_DESDE) if BASE_DESDE else None,
+            date.fromisoformat(BASE_HASTA) if BASE_HASTA else None)
+
+def firma_dataset():
+    ruta = DATASET_PATH if os.path.isdir(DATASET_PATH) else PARQUET_PATH
+    archivos = [ruta] if os.path.isfile(ruta) else [
+        os.path.join(raiz, f) for raiz, _, nombres in os.walk(ruta) for f in nombres
+    ]
+    stats = sorted((f, os.stat(f).st_mtime_ns, os.stat(f).st_size) for f in archivos)
+    return hashlib.sha256(repr(stats).encode()).hexdigest()[:16]
+
+def escribir_base(ruta_arrow, al_progresar=None):
+    tabla = leer_tabla(*ventana_base(), al_progresar=al_progresar)
+    # Orden por fecha y un único batch: to_pandas no tiene que concatenar
+    tabla = tabla.sort_by("fecha_inf_date").combine_chunks()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{ruta_arrow}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as f, ipc.new_file(f, tabla.schema) as writer:
+        writer.write_table(tabla)
+    os.replace(tmp, ruta_arrow)
+    for viejo in os.listdir(CACHE_DIR):
+        if viejo.startswith("base_") and viejo.endswith(".arrow") and os.path.join(CACHE_DIR, viejo) != ruta_arrow:
+            os.remove(os.path.join(CACHE_DIR, viejo))
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def cargar_base(firma: str):
+    desde, hasta = ventana_base()
+    ruta_arrow = os.path.join(CACHE_DIR, f"base_{firma}_{desde or 'inicio'}_{hasta or 'fin'}.arrow")
+    if not os.path.exists(ruta_arrow):
+        placeholder = st.empty()
+        placeholder.info("⏳ Preparando datos por primera vez, por favor espera...")
+        progress = st.progress(0)
+        escribir_base(ruta_arrow, lambda i, n: progress.progress(i / n, text=f"Row group {i}/{n}"))
+        placeholder.empty()
+        progress.empty()
+
+    tabla = ipc.open_file(pa.memory_map(ruta_arrow)).read_all()
+    df = a_pandas(tabla)
+    # La firma viaja con la base: las cachés derivadas (índices, filtros, cubos) se invalidan con ella
+    df.attrs["firma"] = firma
+    return df
+
+def obtener_base():
+    return cargar_base(firma_dataset())
+
+# ===============================
+# 📅 Índice fecha → offset (la base está ordenada por fecha)
+# ===============================
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _indice_fechas(_base, firma):
+    fechas = _base["fecha_dia"].to_numpy()
+    inicios = np.concatenate([[0], np.flatnonzero(fechas[1:] != fechas[:-1]) + 1])
+    return fechas[inicios], np.append(inicios, len(fechas))
+
+def indice_fechas(base):
+    return _indice_fechas(base, base.attrs.get("firma"))
+
+# Un rango de fechas es un tramo contiguo de la base: dos búsquedas binarias, sin recorrer filas
+def tramo_fechas(base, desde, hasta):
+    dias, offsets = indice_fechas(base)
+    i = np.searchsorted(dias, pd.Timestamp(desde).to_datetime64(), side="left")
+    j = np.searchsorted(dias, pd.Timestamp(hasta).to_datetime64(), side="right")
+    return slice(int(offsets[i]), int(offsets[j]))
+
+# Filas seleccionadas: None (todas), un slice (tramo de fechas) o un arreglo int32 de posiciones
+def contar_filas(base, filas):
+    if filas is None:
+        return len(base)
+    if isinstance(filas, slice):
+        return filas.stop - filas.start
+    return len(filas)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+import tempfile
+from datetime import date, timedelta
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from datos import abrir_dataset, campo_fecha, expresion_filtro, limpiar_nombre, nombres_originales
+
+# ===============================
+# 📥 Exportación por lotes de la vista filtrada
+# ===============================
+FORMATOS = {
+    "CSV": ("ffmm_filtrado.csv", "text/csv"),
+    "CSV comprimido (gzip)": ("ffmm_filtrado.csv.gz", "application/gzip"),
+    "Parquet": ("ffmm_filtrado.parquet", "application/vnd.apache.parquet"),
+}
+FILAS_POR_LOTE = 200_000
+# st.download_button lee el archivo entero a memoria para servirlo: la descarga tiene tope de filas
+MAX_FILAS_EXPORTACION = int(os.getenv("DASHBOARD_EXPORTAR_MAX_FILAS", "1000000"))
+
+# Mismo archivo desde cualquier motor: las columnas de fondos_mutuos (la fecha como fecha_inf_date),
+# montos en float64 tal como vienen del origen; lo que el origen no trae sale vacío
+ESQUEMA_EXPORTACION = pa.schema([
+    ("fecha_inf_date", pa.date32()),
+    ("run_fm", pa.int64()),
+    ("serie", pa.string()),
+    ("nombre_corto", pa.string()),
+    ("run_fm_nombrecorto", pa.string()),
+    ("fondo", pa.string()),
+    ("nom_adm", pa.string()),
+    ("raz_social_adm", pa.string()),
+    ("categoria", pa.string()),
+    ("categoria_agrupada", pa.string()),
+    ("tipo_fm", pa.string()),
+    ("moneda", pa.string()),
+    ("serie_apv", pa.string()),
+    ("valor_cuota", pa.float64()),
+    ("num_participes", pa.int64()),
+    ("patrimonio_neto_mm", pa.float64()),
+    ("venta_neta_mm", pa.float64()),
+    ("aportes_mm", pa.float64()),
+    ("rescates_mm", pa.float64()),
+])
+ORDEN_EXPORTACION = ["fecha_inf_date", "run_fm", "serie"]
+
+def ajustar_lote(lote):
+    nombres = lote.schema.names
+    columnas = []
+    for campo in ESQUEMA_EXPORTACION:
+        if campo.name in nombres:
+            columna = lote.column(nombres.index(campo.name))
+            if pa.types.is_dictionary(columna.type):
+                columna = columna.cast(columna.type.value_type)
+            # fechas diarias: la hora siempre es 00:00
+            columnas.append(columna.cast(campo.type, safe=not pa.types.is_timestamp(columna.type)))
+        elif campo.name == "run_fm_nombrecorto" and {"run_fm", "nombre_corto"} <= set(nombres):
+            columnas.append(pc.binary_join_element_wise(
+                lote.column(nombres.index("run_fm")).cast(pa.string()),
+                lote.column(nombres.index("nombre_corto")).cast(pa.string()), " - "))
+        else:
+            columnas.append(pa.nulls(lote.num_rows, campo.type))
+    return pa.RecordBatch.from_arrays(columnas, schema=ESQUEMA_EXPORTACION)
+
+def _ajustar_lotes(lotes, max_filas=None):
+    vacio = True
+    filas = 0
+    for lote in lotes:
+        vacio = False
+        filas += lote.num_rows
+        if max_filas is not None and filas > max_filas:
+            raise ValueError(f"La exportación supera el máximo de {max_filas:,} filas")
+        yield ajustar_lote(lote)
+    # Al menos un lote (vacío si no hay filas) para que el archivo lleve el esquema
+    if vacio:
+        yield pa.RecordBatch.from_pylist([], schema=ESQUEMA_EXPORTACION)
+
+# Desde el dataset, mes a mes: el archivo sale ordenado y en memoria vive un mes filtrado a la vez
+def lotes_dataset(clave, tamano=FILAS_POR_LOTE):
+    filtros, (desde, hasta) = clave
+    desde, hasta = desde.date(), hasta.date()
+    dataset = abrir_dataset()
+    originales = nombres_originales(dataset)
+    fecha = campo_fecha(originales)
+    columnas = {fecha: "fecha_inf_date"}
+    for original in dataset.schema.names:
+        if limpiar_nombre(original) not in ("fecha_inf", "fecha_inf_date", "anio", "mes"):
+            columnas[original] = limpiar_nombre(original)
+    mes = date(desde.year, desde.month, 1)
+    while mes <= hasta:
+        siguiente = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+        expr = expresion_filtro(dataset, max(mes, desde), min(siguiente - timedelta(days=1), hasta), dict(filtros))
+        tabla = dataset.to_table(columns=list(columnas), filter=expr)
+        tabla = tabla.rename_columns([columnas[c] for c in tabla.column_names])
+        orden = [(c, "ascending") for c in ORDEN_EXPORTACION if c in tabla.column_names]
+        yield from tabla.sort_by(orden).to_batches(max_chunksize=tamano)
+        mes = siguiente
+
+def _para_csv(lote):
+    columnas = []
+    for columna in lote.columns:
+        if pa.types.is_dictionary(columna.type):
+            columna = columna.cast(columna.type.value_type)
+        elif pa.types.is_timestamp(columna.type):
+            try:
+                columna = columna.cast(pa.date32())  # fechas diarias: sin "00:00:00"
+            except pa.ArrowInvalid:
+                pass
+        columnas.append(columna)
+    return pa.RecordBatch.from_arrays(columnas, names=lote.schema.names)
+
+def escribir_csv(lotes, destino):
+    destino.write("﻿".encode("utf-8"))  # BOM para que Excel lea bien los acentos
+    escritor = None
+    for lote in lotes:
+        lote = _para_csv(lote)
+        if escritor is None:
+            escritor = pa_csv.CSVWriter(destino, lote.schema)
+        escritor.write_batch(lote)
+    if escritor is not None:
+        escritor.close()
+
+def escribir_parquet(lotes, destino):
+    escritor = None
+    for lote in lotes:
+        if escritor is None:
+            escritor = pq.ParquetWriter(destino, lote.schema, compression="zstd")
+        escritor.write_batch(lote)
+    if escritor is not None:
+        escritor.close()
+
+# Se escribe lote a lote a un archivo temporal, pero la descarga lo sirve completo desde memoria
+def exportar_lotes(lotes, formato, max_filas=MAX_FILAS_EXPORTACION):
+    lotes = _ajustar_lotes(lotes, max_filas)
+    archivo = tempfile.TemporaryFile()
+    if formato == "Parquet":
+        escribir_parquet(lotes, archivo)
+    elif formato == "CSV comprimido (gzip)":
+        with gzip.GzipFile(fileobj=archivo, mode="wb", compresslevel=6) as comprimido:
+            escribir_csv(lotes, comprimido)
+    else:
+        escribir_csv(lotes, archivo)
+    archivo.seek(0)
+    return archivo
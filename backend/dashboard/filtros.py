@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import tramo_fechas
+
+# ===============================
+# 🎯 Motor de filtros sobre códigos de categoría
+# ===============================
+TODO = "(Seleccionar todo)"
+# Cada entrada puede ser un índice int32 de hasta 4 bytes por fila de la base: pocas entradas.
+# Los agregados de cada filtro ya tienen su propio caché; este sólo evita recalcular la máscara
+FILTROS_ENTRADAS = int(os.getenv("DASHBOARD_FILTROS_ENTRADAS", "8"))
+
+COLUMNAS_FILTRO = [
+    "categoria_agrupada", "categoria", "nom_adm", "run_fm_nombrecorto", "tipo_fm", "serie"
+]
+
+# Selección del multiselect → None (sin predicado) o tupla ordenada de valores
+def normalizar_seleccion(seleccion, universo, vacio_filtra=True):
+    seleccion = list(seleccion or [])
+    if TODO in seleccion and len(seleccion) == 1:
+        return None
+    valores = tuple(sorted(set(seleccion) - {TODO}))
+    if not valores and not vacio_filtra:
+        return None
+    if set(valores) >= set(universo):
+        return None
+    return valores
+
+# Clave hashable y canónica: dos selecciones equivalentes comparten resultado en caché
+def clave_filtro(selecciones, rango):
+    filtros = tuple((col, valores) for col, valores in sorted(selecciones.items()) if valores is not None)
+    return filtros, (pd.Timestamp(rango[0]), pd.Timestamp(rango[1]))
+
+def mascara_columna(columna, valores, tramo):
+    categorias = columna.cat.categories
+    # Tabla de búsqueda por código; el último lugar (código -1 = nulo) queda en False
+    permitidos = np.zeros(len(categorias) + 1, dtype=bool)
+    posiciones = categorias.get_indexer(list(valores))
+    permitidos[posiciones[posiciones >= 0]] = True
+    return permitidos[columna.cat.codes.to_numpy()[tramo]]
+
+@st.cache_resource(max_entries=FILTROS_ENTRADAS, show_spinner=False)
+def _filas_filtradas(_base, firma, clave):
+    filtros, (desde, hasta) = clave
+    # Las fechas recortan el tramo; el resto de los filtros sólo mira filas dentro de él
+    tramo = tramo_fechas(_base, desde, hasta)
+    mascara = None
+    for col, valores in filtros:
+        if col in _base.columns:
+            parcial = mascara_columna(_base[col], valores, tramo)
+            mascara = parcial if mascara is None else mascara & parcial
+    if mascara is None or mascara.all():
+        return None if tramo == slice(0, len(_base)) else tramo
+    # int32 alcanza para la base completa y ocupa la mitad; compartido entre sesiones: de sólo lectura
+    filas = (np.flatnonzero(mascara) + tramo.start).astype(np.int32)
+    filas.flags.writeable = False
+    return filas
+
+def aplicar_filtros(base, clave):
+    return _filas_filtradas(base, base.attrs.get("firma"), clave)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+import importlib
+import streamlit as st
+from agregados import PUNTOS_MAX, serie_grafico as _serie_grafico
+
+# ===============================
+# 🔌 Origen de datos del dashboard (DASHBOARD_BACKEND)
+# ===============================
+# pandas: base compartida en memoria | duckdb: SQL sobre el parquet, sin materializar la base
+# postgres: SQL contra fondos_mutuos y sus rollups (réplicas del dashboard comparten la base)
+MOTORES = {
+    "pandas": "motor_pandas",
+    "duckdb": "motor_duckdb",
+    "postgres": "motor_postgres",
+}
+BACKEND = os.getenv("DASHBOARD_BACKEND", "pandas").lower()
+if BACKEND not in MOTORES:
+    raise ValueError(f"DASHBOARD_BACKEND no soportado: {BACKEND}. Opciones: {list(MOTORES)}")
+motor = importlib.import_module(MOTORES[BACKEND])
+
+# (primera, última) fecha con datos; None si la fuente está vacía
+def rango_disponible():
+    return motor.rango()
+
+def opciones_filtros():
+    return motor.opciones()
+
+def total_filas(clave):
+    return motor.contar(clave)
+
+# ===============================
+# 👤 Sesión: sólo la clave de filtros; los resultados viven en cachés compartidas
+# ===============================
+# Clave del filtro vigente (filtros aplicados o, si no hay, la ventana cargada)
+def clave_sesion():
+    if "clave_filtro" in st.session_state:
+        return st.session_state["clave_filtro"]
+    return st.session_state.get("clave_ventana")
+
+def total_filas_sesion():
+    return motor.contar(clave_sesion())
+
+def cubo_sesion():
+    return motor.cubo(clave_sesion())
+
+def serie_grafico(columna, modo="suma", acumular=False, presupuesto=PUNTOS_MAX):
+    return _serie_grafico(cubo_sesion(), motor.firma(), clave_sesion(), columna, modo, acumular, presupuesto)
+
+def ranking_sesion(k=20):
+    return motor.ranking(clave_sesion(), k)
+
+def exportar_sesion(formato):
+    return motor.exportar(clave_sesion(), formato)
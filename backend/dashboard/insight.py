@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import streamlit as st
+from datos import CACHE_DIR
+
+# ===============================
+# ⚙️ Configuración de Insight IA
+# ===============================
+# openai: API real | local: respuestas deterministas sin red ni clave (pruebas, desarrollo)
+INSIGHT_CLIENTE = os.getenv("INSIGHT_CLIENTE", "openai").lower()
+INSIGHT_MODELO = os.getenv("INSIGHT_MODELO", "gpt-4o-mini")
+INSIGHT_CACHE_TTL = int(os.getenv("INSIGHT_CACHE_TTL", str(24 * 3600)))
+INSIGHT_CACHE_ENTRADAS = int(os.getenv("INSIGHT_CACHE_ENTRADAS", "256"))
+# En disco las respuestas sobreviven a reinicios y se comparten entre réplicas con el mismo volumen
+INSIGHT_CACHE_DISCO = os.getenv("INSIGHT_CACHE_DISCO", "0") == "1"
+INSIGHT_CACHE_DIR = os.path.join(CACHE_DIR, "insight")
+
+class FaltaClave(Exception):
+    pass
+
+class SinCredito(Exception):
+    pass
+
+# ===============================
+# 🤖 Clientes intercambiables: stream(modelo, mensajes, max_tokens) → trozos de texto
+# ===============================
+class ClienteOpenAI:
+    def __init__(self, api_key):
+        from openai import OpenAI
+        self._cliente = OpenAI(api_key=api_key)
+
+    def stream(self, modelo, mensajes, max_tokens=800):
+        from openai import RateLimitError
+        try:
+            respuesta = self._cliente.chat.completions.create(
+                model=modelo, messages=mensajes, max_tokens=max_tokens, stream=True
+            )
+            for evento in respuesta:
+                if evento.choices and evento.choices[0].delta.content:
+                    yield evento.choices[0].delta.content
+        except RateLimitError:
+            raise SinCredito()
+
+class ClienteLocal:
+    def __init__(self, api_key=None):
+        pass
+
+    def stream(self, modelo, mensajes, max_tokens=800):
+        pregunta = mensajes[-1]["content"].strip().splitlines()[-1].strip()
+        palabras = f"Respuesta local de prueba ({modelo}) a: {pregunta}".split(" ")
+        for i, palabra in enumerate(palabras):
+            yield palabra if i == 0 else " " + palabra
+
+CLIENTES = {
+    "openai": ClienteOpenAI,
+    "local": ClienteLocal,
+}
+
+def clave_openai():
+    try:
+        return st.secrets["OPENAI_API_KEY"]  # Local con secrets.toml
+    except Exception:
+        return os.getenv("OPENAI_API_KEY")   # Producción con variable de entorno
+
+# Un cliente por proceso y clave, compartido por las sesiones: al rotar la clave se crea otro
+@st.cache_resource(show_spinner=False)
+def _cliente(nombre, api_key):
+    return CLIENTES[nombre](api_key)
+
+def obtener_cliente(nombre=INSIGHT_CLIENTE):
+    if nombre not in CLIENTES:
+        raise ValueError(f"INSIGHT_CLIENTE no soportado: {nombre}. Opciones: {list(CLIENTES)}")
+    api_key = clave_openai() if nombre == "openai" else None
+    if nombre == "openai" and not api_key:
+        raise FaltaClave()
+    return _cliente(nombre, api_key)
+
+# ===============================
+# 🗃️ Caché de respuestas: LRU + TTL en memoria y, opcionalmente, en disco
+# ===============================
+class CacheRespuestas:
+    def __init__(self, max_entradas, ttl, directorio=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.directorio = directorio
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def _en_memoria(self, clave, texto, creado):
+        with self._lock:
+            self._datos[clave] = (texto, creado)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener(self, clave):
+        ahora = time.time()
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is not None and ahora - item[1] <= self.ttl:
+                self._datos.move_to_end(clave)
+                return item[0]
+            self._datos.pop(clave, None)
+        if not self.directorio:
+            return None
+        try:
+            with open(self._ruta(clave), encoding="utf-8") as f:
+                guardado = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ahora - guardado["creado"] > self.ttl:
+            try:
+                os.remove(self._ruta(clave))
+            except OSError:
+                pass
+            return None
+        self._en_memoria(clave, guardado["texto"], guardado["creado"])
+        return guardado["texto"]
+
+    def guardar(self, clave, texto):
+        creado = time.time()
+        self._en_memoria(clave, texto, creado)
+        if self.directorio:
+            temporal = f"{self._ruta(clave)}.{os.getpid()}.tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump({"creado": creado, "texto": texto}, f, ensure_ascii=False)
+            os.replace(temporal, self._ruta(clave))
+
+@st.cache_resource(show_spinner=False)
+def cache_respuestas():
+    return CacheRespuestas(INSIGHT_CACHE_ENTRADAS, INSIGHT_CACHE_TTL,
+                           INSIGHT_CACHE_DIR if INSIGHT_CACHE_DISCO else None)
+
+# Los mensajes ya traen el contexto (top 20) y la pregunta con su historial
+def clave_respuesta(modelo, mensajes, max_tokens):
+    contenido = json.dumps([modelo, mensajes, max_tokens], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+# Generador de trozos de texto: un acierto de caché sale entero de una vez
+def responder(mensajes, cliente, modelo=INSIGHT_MODELO, max_tokens=800):
+    cache = cache_respuestas()
+    clave = clave_respuesta(modelo, mensajes, max_tokens)
+    texto = cache.obtener(clave)
+    if texto is not None:
+        yield texto
+        return
+    partes = []
+    for parte in cliente.stream(modelo, mensajes, max_tokens):
+        partes.append(parte)
+        yield parte
+    # Sólo se guarda la respuesta completa: un stream cortado no queda a medias en caché
+    cache.guardar(clave, "".join(partes))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import os
+import duckdb
+import pandas as pd
+import streamlit as st
+from datos import (DATASET_PATH, PARQUET_PATH, abrir_dataset, campo_fecha,
+                   firma_dataset, nombres_originales, rango_disponible)
+from filtros import COLUMNAS_FILTRO
+from consultas import condicion, separar_total, sql_contar, sql_cubo, sql_opciones, sql_ranking
+from exportar import FILAS_POR_LOTE, ORDEN_EXPORTACION, exportar_lotes
+
+# ===============================
+# 🦆 Motor DuckDB: SQL sobre el parquet, sólo se materializan resultados chicos
+# ===============================
+DUCKDB_THREADS = os.getenv("DUCKDB_THREADS")
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT")
+
+def _origen():
+    if os.path.isdir(DATASET_PATH):
+        ruta = os.path.join(DATASET_PATH, "**", "*.parquet").replace("'", "''")
+        return f"read_parquet('{ruta}', hive_partitioning = true)", True
+    return f"read_parquet('{PARQUET_PATH.replace(chr(39), chr(39) * 2)}')", False
+
+# Vista con los nombres limpios que usa el dashboard (el parquet legado trae otros)
+def _sql_vista():
+    originales = nombres_originales(abrir_dataset())
+    fecha = campo_fecha(originales)
+    origen, particionado = _origen()
+    columnas = [
+        f'CAST("{fecha}" AS TIMESTAMP) AS fecha_inf_date',
+        f'CAST("{fecha}" AS DATE) AS fecha_dia',
+    ]
+    # Todas las columnas del origen: las consultas leen sólo las que usan, la exportación las lleva todas
+    for col, original in originales.items():
+        if col not in ("fecha_inf", "fecha_inf_date", "anio", "mes"):
+            columnas.append(f'"{original}" AS {col}')
+    if "run_fm_nombrecorto" not in originales:
+        columnas.append("CAST(run_fm AS VARCHAR) || ' - ' || nombre_corto AS run_fm_nombrecorto")
+    if particionado:
+        columnas += ["anio", "mes"]
+    return f"CREATE OR REPLACE VIEW ffmm AS SELECT {', '.join(columnas)} FROM {origen}", particionado
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _conexion(firma):
+    config = {}
+    if DUCKDB_THREADS:
+        config["threads"] = int(DUCKDB_THREADS)
+    if DUCKDB_MEMORY_LIMIT:
+        config["memory_limit"] = DUCKDB_MEMORY_LIMIT
+    conexion = duckdb.connect(config=config)
+    vista, particionado = _sql_vista()
+    conexion.execute(vista)
+    return conexion, particionado
+
+def _consultar(firma, sql, params):
+    conexion, _ = _conexion(firma)
+    # Un cursor por consulta: la conexión se comparte entre sesiones (hilos)
+    return conexion.cursor().execute(sql, params)
+
+def _where(firma, clave):
+    where, params = condicion(clave, lambda n: f"${n}")
+    if _conexion(firma)[1]:
+        # Poda de particiones anio=/mes= antes de abrir archivos
+        where += " AND anio BETWEEN $anio_desde AND $anio_hasta"
+        params.update(anio_desde=params["desde"].year, anio_hasta=params["hasta"].year)
+    return where, params
+
+def firma():
+    return firma_dataset()
+
+def rango():
+    return rango_disponible(firma_dataset())
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _opciones(firma):
+    return {col: [v for (v,) in _consultar(firma, sql_opciones("ffmm", col), {}).fetchall()] for col in COLUMNAS_FILTRO}
+
+def opciones():
+    return _opciones(firma_dataset())
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def _contar(firma, clave):
+    where, params = _where(firma, clave)
+    return _consultar(firma, sql_contar("ffmm", where), params).fetchone()[0]
+
+def contar(clave):
+    return _contar(firma_dataset(), clave)
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cubo(firma, clave):
+    where, params = _where(firma, clave)
+    cubo = _consultar(firma, sql_cubo("ffmm", where), params).df()
+    cubo["fecha_dia"] = pd.to_datetime(cubo["fecha_dia"])
+    return cubo.set_index("fecha_dia").astype("float64")
+
+def cubo(clave):
+    return _cubo(firma_dataset(), clave)
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _ranking(firma, clave, k):
+    where, params = _where(firma, clave)
+    return separar_total(_consultar(firma, sql_ranking("ffmm", where, k), params).df())
+
+def ranking(clave, k=20):
+    return _ranking(firma_dataset(), clave, k)
+
+def _lotes(firma, clave):
+    where, params = _where(firma, clave)
+    sql = (f"SELECT * EXCLUDE (fecha_dia{', anio, mes' if _conexion(firma)[1] else ''}) FROM ffmm "
+           f"WHERE {where} ORDER BY {', '.join(ORDEN_EXPORTACION)}")
+    yield from _consultar(firma, sql, params).fetch_record_batch(FILAS_POR_LOTE)
+
+def exportar(clave, formato):
+    firma = firma_dataset()
+    return lambda: exportar_lotes(_lotes(firma, clave), formato)
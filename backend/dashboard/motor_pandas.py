@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from datos import contar_filas, firma_dataset, obtener_base, rango_disponible, ventana_base
+from filtros import COLUMNAS_FILTRO, aplicar_filtros
+from agregados import cubo_diario, ranking as ranking_fondos
+from exportar import exportar_lotes, lotes_dataset
+
+# ===============================
+# 🐼 Motor pandas: base compartida en memoria + índices de filas
+# ===============================
+def firma():
+    return firma_dataset()
+
+# Sólo lo que está en la base (FFMM_BASE_DESDE/HASTA)
+def rango():
+    disponible = rango_disponible(firma_dataset())
+    if disponible is None:
+        return None
+    minimo, maximo = disponible
+    desde, hasta = ventana_base()
+    return max(minimo, desde or minimo), min(maximo, hasta or maximo)
+
+# Las columnas de texto son categóricas: las opciones salen de las categorías, sin recorrer filas
+def opciones():
+    base = obtener_base()
+    return {col: sorted(base[col].cat.categories) if col in base.columns else [] for col in COLUMNAS_FILTRO}
+
+def contar(clave):
+    base = obtener_base()
+    return contar_filas(base, aplicar_filtros(base, clave))
+
+def cubo(clave):
+    base = obtener_base()
+    return cubo_diario(base, aplicar_filtros(base, clave), clave)
+
+def ranking(clave, k=20):
+    base = obtener_base()
+    return ranking_fondos(base, aplicar_filtros(base, clave), clave, k)
+
+# Devuelve una función sin argumentos: la descarga la ejecuta en otro hilo, al hacer clic.
+# Se lee del dataset y no de la base: la base no trae todas las columnas y puede tener montos en float32
+def exportar(clave, formato):
+    return lambda: exportar_lotes(lotes_dataset(clave), formato)
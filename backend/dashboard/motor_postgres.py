@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import importlib.util
+from datetime import timedelta
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from datos import COLUMNAS_MM
+from filtros import COLUMNAS_FILTRO
+from consultas import condicion, condicion_filtros, separar_total, sql_contar, sql_cubo, sql_opciones, sql_ranking
+from exportar import ESQUEMA_EXPORTACION, FILAS_POR_LOTE, ORDEN_EXPORTACION, exportar_lotes
+
+# backend/ al path para reutilizar etl/; app/database.py se carga por ruta (dashboard/app.py tapa el paquete "app")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+from etl.esquema import inicio_mes, mes_siguiente
+from etl.rollups import DIMENSIONES_DIARIO, DIMENSIONES_FONDO, nombre_rollup_diario, nombre_rollup_fondo
+
+def _cargar_database():
+    spec = importlib.util.spec_from_file_location("app_database", os.path.join(BACKEND_DIR, "app", "database.py"))
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+# ===============================
+# 🐘 Motor Postgres: filtros y agregaciones en la base, a la sesión sólo llegan filas agregadas
+# ===============================
+TABLA = os.getenv("DASHBOARD_TABLA", "fondos_mutuos")
+ROLLUP_DIARIO = nombre_rollup_diario(TABLA)
+ROLLUP_FONDO = nombre_rollup_fondo(TABLA)
+# Cada cuánto se vuelve a mirar etl_cargas para detectar una carga nueva
+VERSION_TTL = int(os.getenv("DASHBOARD_VERSION_TTL", "60"))
+CACHE_ENTRADAS = int(os.getenv("DASHBOARD_CACHE_ENTRADAS", "256"))
+
+@st.cache_resource(show_spinner=False)
+def _engine():
+    # Un solo pool por proceso, compartido por todas las sesiones
+    return _cargar_database().engine
+
+# Versión de los datos = última carga registrada; al cambiar, las cachés de abajo quedan obsoletas solas
+@st.cache_data(ttl=VERSION_TTL, show_spinner=False)
+def _version():
+    try:
+        with _engine().connect() as conn:
+            fila = conn.execute(
+                text("SELECT MAX(id), MAX(cargado_en) FROM etl_cargas WHERE tabla = :t"), {"t": TABLA}
+            ).one()
+        return f"{fila[0]}:{fila[1]}"
+    except SQLAlchemyError:
+        return "sin_cargas"
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _tablas(version):
+    return set(inspect(_engine()).get_table_names())
+
+# Caché de resultados por consulta: mismo SQL + mismos parámetros sobre la misma versión
+@st.cache_resource(max_entries=CACHE_ENTRADAS, show_spinner=False)
+def _consultar(version, sql, params):
+    with _engine().connect() as conn:
+        return pd.read_sql_query(text(sql), conn, params=dict(params))
+
+def consultar(sql, params=None):
+    return _consultar(_version(), sql, tuple(sorted((params or {}).items())))
+
+def _marcador(nombre):
+    return f":{nombre}"
+
+# El rollup sirve si existe y tiene todas las columnas filtradas
+def _usa_rollup(tabla, dimensiones, clave):
+    filtros, _ = clave
+    return tabla in _tablas(_version()) and all(col in dimensiones for col, _ in filtros)
+
+def firma():
+    return _version()
+
+def rango():
+    tabla = ROLLUP_DIARIO if ROLLUP_DIARIO in _tablas(_version()) else TABLA
+    fila = consultar(f'SELECT MIN(fecha_inf) AS minimo, MAX(fecha_inf) AS maximo FROM "{tabla}"').iloc[0]
+    # Tabla vacía: MIN/MAX son NULL
+    if pd.isna(fila["minimo"]):
+        return None
+    return pd.Timestamp(fila["minimo"]).date(), pd.Timestamp(fila["maximo"]).date()
+
+def opciones():
+    resultado = {}
+    for col in COLUMNAS_FILTRO:
+        tabla = ROLLUP_DIARIO if col in DIMENSIONES_DIARIO and ROLLUP_DIARIO in _tablas(_version()) else TABLA
+        resultado[col] = consultar(sql_opciones(f'"{tabla}"', col))[col].tolist()
+    return resultado
+
+def contar(clave):
+    where, params = condicion(clave, _marcador, fecha="fecha_inf")
+    if _usa_rollup(ROLLUP_DIARIO, DIMENSIONES_DIARIO, clave):
+        sql = f'SELECT COALESCE(SUM(filas), 0) AS filas FROM "{ROLLUP_DIARIO}" WHERE {where}'
+    else:
+        sql = sql_contar(f'"{TABLA}"', where)
+    return int(consultar(sql, params).iloc[0, 0])
+
+def cubo(clave):
+    tabla = ROLLUP_DIARIO if _usa_rollup(ROLLUP_DIARIO, DIMENSIONES_DIARIO, clave) else TABLA
+    where, params = condicion(clave, _marcador, fecha="fecha_inf")
+    resultado = consultar(sql_cubo(f'"{tabla}"', where, fecha="fecha_inf"), params)
+    indice = pd.DatetimeIndex(pd.to_datetime(resultado["fecha_dia"]), name="fecha_dia")
+    return pd.DataFrame(resultado[COLUMNAS_MM].to_numpy("float64"), index=indice, columns=COLUMNAS_MM)
+
+# Meses enteros dentro del rango → rollup fondo×mes; los días sueltos de los bordes → tabla base
+def _sql_ranking_mixto(clave, k):
+    filtros, (desde, hasta) = clave
+    desde, hasta = desde.date(), hasta.date()
+    mes_desde = desde if desde.day == 1 else mes_siguiente(desde)
+    mes_hasta = inicio_mes(hasta + timedelta(days=1))
+    if mes_desde >= mes_hasta:
+        return None
+    partes, params = condicion_filtros(filtros, _marcador)
+    extra = "".join(f" AND {p}" for p in partes)
+    columnas = "run_fm, nombre_corto, nom_adm, venta_neta_mm"
+    origen = (
+        f'(SELECT {columnas} FROM "{ROLLUP_FONDO}" WHERE mes >= :mes_desde AND mes < :mes_hasta{extra} '
+        f'UNION ALL SELECT {columnas} FROM "{TABLA}" WHERE fecha_inf BETWEEN :desde AND :hasta '
+        f"AND (fecha_inf < :mes_desde OR fecha_inf >= :mes_hasta){extra}) AS t"
+    )
+    params.update(desde=desde, hasta=hasta, mes_desde=mes_desde, mes_hasta=mes_hasta)
+    return sql_ranking(origen, "TRUE", k), params
+
+def ranking(clave, k=20):
+    mixto = _sql_ranking_mixto(clave, k) if _usa_rollup(ROLLUP_FONDO, DIMENSIONES_FONDO, clave) else None
+    if mixto is None:
+        where, params = condicion(clave, _marcador, fecha="fecha_inf")
+        mixto = sql_ranking(f'"{TABLA}"', where, k), params
+    return separar_total(consultar(*mixto))
+
+# ===============================
+# 📥 Exportación: cursor del lado del servidor, un lote a la vez
+# ===============================
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _columnas(version):
+    return {c["name"] for c in inspect(_engine()).get_columns(TABLA)}
+
+def _lotes(clave):
+    # Mismas columnas que exportan los otros motores (la fecha del día va como fecha_inf_date)
+    columnas = _columnas(_version())
+    select = ["fecha_inf AS fecha_inf_date"] + [c.name for c in ESQUEMA_EXPORTACION if c.name in columnas]
+    where, params = condicion(clave, _marcador, fecha="fecha_inf")
+    orden = ", ".join("fecha_inf" if c == "fecha_inf_date" else c for c in ORDEN_EXPORTACION)
+    sql = f'SELECT {", ".join(select)} FROM "{TABLA}" WHERE {where} ORDER BY {orden}'
+    with _engine().connect() as conn:
+        resultado = conn.execution_options(stream_results=True).execute(text(sql), params)
+        nombres = list(resultado.keys())
+        for filas in resultado.partitions(FILAS_POR_LOTE):
+            valores = list(zip(*filas))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(v, type=ESQUEMA_EXPORTACION.field(n).type) for v, n in zip(valores, nombres)], names=nombres
+            )
+
+def exportar(clave, formato):
+    return lambda: exportar_lotes(_lotes(clave), formato)
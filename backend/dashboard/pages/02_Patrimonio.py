@@ -1,6 +1,6 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
+from fuente import cubo_sesion, serie_grafico
 
 if not st.session_state.get("datos_cargados", False):
     st.warning("⏳ Los datos aún se están cargando. Vuelve cuando termine de aplicar filtros.")
@@ -8,13 +8,15 @@ if not st.session_state.get("datos_cargados", False):
 
 st.title('📈 Patrimonio Neto Total (MM CLP)')
 
-df = st.session_state.get("df_filtrado", st.session_state.df)
+cubo = cubo_sesion()
 
-@st.cache_data
-def calcular_patrimonio(df: pd.DataFrame):
-    return df.groupby("fecha_dia")["patrimonio_neto_mm"].sum().sort_index().reset_index()
+if cubo.empty:
+    st.warning("⚠️ No hay datos disponibles con los filtros actuales.")
+    st.stop()
 
-patrimonio_total = calcular_patrimonio(df)
+# Saldo: en resolución semanal o mensual se muestra el valor al cierre de cada período
+serie, resolucion = serie_grafico("patrimonio_neto_mm", modo="ultimo")
+patrimonio_total = serie.reset_index()
 patrimonio_total["patrimonio_neto_mm"] = patrimonio_total["patrimonio_neto_mm"].round(0)
 
 # ✅ Formato chileno para tooltip
@@ -37,6 +39,7 @@ chart = alt.Chart(patrimonio_total).mark_bar(color="#0066cc").encode(
 )
 
 st.altair_chart(chart, use_container_width=True)
+st.caption(f"Resolución {resolucion}")
 
 
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
+from fuente import cubo_sesion, serie_grafico
 
 # 🚦 Bloquear si los datos no están listos
 if not st.session_state.get("datos_cargados", False):
@@ -9,44 +10,30 @@ if not st.session_state.get("datos_cargados", False):
 st.title("💵 Venta Neta Acumulada (MM CLP)")
 
 # ===============================
-# 📂 Tomar datos filtrados
+# 📂 Cubo diario del filtro vigente
 # ===============================
-df = st.session_state.get("df_filtrado", st.session_state.df)
+cubo = cubo_sesion()
 
-if df.empty:
+if cubo.empty:
     st.warning("⚠️ No hay datos disponibles con los filtros actuales.")
     st.stop()
 
 # ===============================
 # 📈 Venta neta acumulada
 # ===============================
-venta_neta_acumulada = (
-    df.groupby("fecha_dia")["venta_neta_mm"]
-    .sum()
-    .cumsum()
-    .sort_index()
-)
+venta_neta_acumulada, resolucion = serie_grafico("venta_neta_mm", modo="ultimo", acumular=True)
 st.bar_chart(venta_neta_acumulada, height=300, use_container_width=True)
+st.caption(f"Resolución {resolucion}")
 
 # ===============================
 # 📊 Aportes y rescates ocultos
 # ===============================
 with st.expander("📊 Ver Aportes y Rescates acumulados", expanded=False):
     st.markdown("#### Evolución acumulada de Aportes (en millones de CLP)")
-    aportes_acumulados = (
-        df.groupby("fecha_dia")["aportes_mm"]
-        .sum()
-        .cumsum()
-        .sort_index()
-    )
+    aportes_acumulados, _ = serie_grafico("aportes_mm", modo="ultimo", acumular=True)
     st.bar_chart(aportes_acumulados, height=250, use_container_width=True)
 
     st.markdown("#### Evolución acumulada de Rescates (en millones de CLP)")
-    rescates_acumulados = (
-        df.groupby("fecha_dia")["rescates_mm"]
-        .sum()
-        .cumsum()
-        .sort_index()
-    )
+    rescates_acumulados, _ = serie_grafico("rescates_mm", modo="ultimo", acumular=True)
     st.bar_chart(rescates_acumulados, height=250, use_container_width=True)
 
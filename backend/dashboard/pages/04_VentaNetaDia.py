@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
+from fuente import cubo_sesion, serie_grafico
 
 # 🚦 Bloquear si los datos no están listos
 if not st.session_state.get("datos_cargados", False):
@@ -9,40 +10,29 @@ if not st.session_state.get("datos_cargados", False):
 st.title("📅 Venta Neta Diaria (MM CLP)")
 
 # ===============================
-# 📂 Tomar datos filtrados
+# 📂 Cubo diario del filtro vigente
 # ===============================
-df = st.session_state.get("df_filtrado", st.session_state.df)
+cubo = cubo_sesion()
 
-if df.empty:
+if cubo.empty:
     st.warning("⚠️ No hay datos disponibles con los filtros actuales.")
     st.stop()
 
 # ===============================
 # 📈 Venta neta diaria (sin acumulación)
 # ===============================
-venta_neta_diaria = (
-    df.groupby("fecha_dia")["venta_neta_mm"]
-    .sum()
-    .sort_index()
-)
+venta_neta_diaria, resolucion = serie_grafico("venta_neta_mm")
 st.bar_chart(venta_neta_diaria, height=300, use_container_width=True)
+st.caption(f"Resolución {resolucion}: venta neta sumada por período")
 
 # ===============================
 # 📊 Aportes y rescates diarios ocultos
 # ===============================
 with st.expander("📊 Ver Aportes y Rescates diarios", expanded=False):
     st.markdown("#### Evolución diaria de Aportes (en millones de CLP)")
-    aportes_diarios = (
-        df.groupby("fecha_dia")["aportes_mm"]
-        .sum()
-        .sort_index()
-    )
+    aportes_diarios, _ = serie_grafico("aportes_mm")
     st.bar_chart(aportes_diarios, height=250, use_container_width=True)
 
     st.markdown("#### Evolución diaria de Rescates (en millones de CLP)")
-    rescates_diarios = (
-        df.groupby("fecha_dia")["rescates_mm"]
-        .sum()
-        .sort_index()
-    )
+    rescates_diarios, _ = serie_grafico("rescates_mm")
     st.bar_chart(rescates_diarios, height=250, use_container_width=True)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
-import pandas as pd
+from fuente import exportar_sesion, ranking_sesion, total_filas_sesion
+from exportar import FORMATOS, MAX_FILAS_EXPORTACION
 
 # 🚦 Bloquear si los datos no están listos
 if not st.session_state.get("datos_cargados", False):
@@ -12,37 +13,19 @@ st.title("📜 Listado de Fondos Mutuos")
 # ===============================
 # 📂 Tomar datos filtrados
 # ===============================
-df = st.session_state.get("df_filtrado", st.session_state.df)
+total_filas = total_filas_sesion()
 
-if df.empty:
+if total_filas == 0:
     st.warning("⚠️ No hay datos disponibles con los filtros actuales.")
     st.stop()
 
 # ===============================
-# 📊 Ranking por venta neta (cache estable)
+# 📊 Ranking por venta neta (motor compartido, cacheado por filtro)
 # ===============================
-@st.cache_data
-def calcular_ranking(valores):
-    print("🔄 Recalculando ranking de fondos...")  # Debug log
-    columnas = ["run_fm", "nombre_corto", "nom_adm", "venta_neta_mm"]
-    df_reducido = pd.DataFrame(valores, columns=columnas)
-
-    # 🔑 Convertir venta_neta_mm a numérico
-    df_reducido["venta_neta_mm"] = pd.to_numeric(df_reducido["venta_neta_mm"], errors="coerce").fillna(0)
-
-    ranking = (
-        df_reducido.groupby(["run_fm", "nombre_corto", "nom_adm"], as_index=False)["venta_neta_mm"]
-        .sum()
-        .sort_values(by="venta_neta_mm", ascending=False)
-    )
-    return ranking
-
-ranking = calcular_ranking(df[["run_fm", "nombre_corto", "nom_adm", "venta_neta_mm"]].values)
+ranking, total_fondos = ranking_sesion(20)
 
 # Determinar si mostrar top 20 o todo
-total_fondos = ranking.shape[0]
 if total_fondos > 20:
-    ranking = ranking.nlargest(20, "venta_neta_mm")
     titulo = f"Top 20 Fondos por Venta Neta de {total_fondos} totales"
 else:
     titulo = f"Listado de Fondos Mutuos (total: {total_fondos})"
@@ -55,6 +38,7 @@ st.subheader(titulo)
 def generar_url_cmf(rut):
     return f"https://www.cmfchile.cl/institucional/mercados/entidad.php?auth=&send=&mercado=V&rut={rut}&tipoentidad=RGFMU&vig=VI&row=AAAw+cAAhAABP4UAAB&control=svs&pestania=1"
 
+ranking = ranking.copy()
 ranking["URL CMF"] = ranking["run_fm"].astype(str).apply(generar_url_cmf)
 
 # Formatear columnas
@@ -83,24 +67,25 @@ else:
 st.markdown(mostrar.to_html(index=False, escape=False), unsafe_allow_html=True)
 
 # ===============================
-# 📥 Descargar CSV
+# 📥 Descargar datos filtrados (con tope de filas: la descarga se sirve completa desde memoria)
 # ===============================
-MAX_FILAS = 50_000
 st.markdown("### ⬇️ Descargar datos filtrados")
 
-st.caption(f"🔢 Total de filas disponibles: {df.shape[0]:,}")
+st.caption(f"🔢 Total de filas disponibles: {total_filas:,}")
 
-if df.shape[0] > MAX_FILAS:
-    st.warning(f"⚠️ La descarga está limitada a {MAX_FILAS:,} filas. Aplica más filtros para reducir el tamaño (actual: {df.shape[0]:,} filas).")
-else:
-    @st.cache_data(hash_funcs={pd.DataFrame: lambda _: None})
-    def generar_csv(df):
-        return df.to_csv(index=False).encode("utf-8-sig")
-
-    csv_data = generar_csv(df)
-    st.download_button(
-        label="⬇️ Descargar CSV",
-        data=csv_data,
-        file_name="ffmm_filtrado.csv",
-        mime="text/csv"
-    )
+if total_filas > MAX_FILAS_EXPORTACION:
+    st.warning(f"⚠️ La descarga admite hasta {MAX_FILAS_EXPORTACION:,} filas. "
+               "Acota el rango de fechas o los filtros para descargar.")
+    st.stop()
+
+formato = st.radio("Formato", list(FORMATOS), horizontal=True)
+nombre_archivo, mime = FORMATOS[formato]
+
+# El archivo se genera recién al hacer clic, lote a lote desde la vista filtrada
+st.download_button(
+    label=f"⬇️ Descargar {formato}",
+    data=exportar_sesion(formato),
+    file_name=nombre_archivo,
+    mime=mime,
+    on_click="ignore"
+)
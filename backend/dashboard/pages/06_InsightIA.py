@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
+import itertools
 import streamlit as st
-from openai import OpenAI, RateLimitError
-import os
-import pandas as pd
+from fuente import ranking_sesion
+from insight import INSIGHT_MODELO, FaltaClave, SinCredito, obtener_cliente, responder
 
 # 🚦 Bloquear si los datos no están listos
 if not st.session_state.get("datos_cargados", False):
@@ -12,45 +12,21 @@ if not st.session_state.get("datos_cargados", False):
 st.title("💡 Insight IA")
 
 # ===============================
-# 📂 Tomar datos filtrados
+# 📌 Top 20 fondos (motor de ranking compartido)
 # ===============================
-df = st.session_state.get("df_filtrado", st.session_state.df)
-
-# ===============================
-# 📌 Top 20 fondos (cacheado)
-# ===============================
-@st.cache_data
-def calcular_top20(df_filtrado: pd.DataFrame):
-    print("🔄 Recalculando Top 20 para Insight IA...")  # Debug log
-    columnas = ["run_fm", "nombre_corto", "nom_adm", "venta_neta_mm"]
-    df_reducido = df_filtrado[columnas].copy()
-
-    # 🔑 Convertir a numérico para evitar errores con nlargest
-    df_reducido["venta_neta_mm"] = pd.to_numeric(df_reducido["venta_neta_mm"], errors="coerce").fillna(0)
-
-    top = (
-        df_reducido.groupby(["run_fm", "nombre_corto", "nom_adm"], as_index=False)["venta_neta_mm"]
-        .sum()
-        .nlargest(20, "venta_neta_mm")
-    )
-    return top
-
-top_fondos = calcular_top20(df)
+top_fondos, _ = ranking_sesion(20)
 contexto = top_fondos.to_string(index=False)
 
 # ===============================
-# 🔑 API Key híbrida (local o Railway)
+# 🔑 Cliente de IA (INSIGHT_CLIENTE: openai o local)
 # ===============================
 try:
-    OPENAI_KEY = st.secrets["OPENAI_API_KEY"]  # Local con secrets.toml
-except Exception:
-    OPENAI_KEY = os.getenv("OPENAI_API_KEY")   # Producción con variable de entorno
-
-if not OPENAI_KEY:
+    cliente = obtener_cliente()
+except FaltaClave:
     st.error("❌ No se encontró OPENAI_API_KEY en secrets.toml ni en variables de entorno.")
     st.stop()
 
-client = OpenAI(api_key=OPENAI_KEY)
+SISTEMA = {"role": "system", "content": "Eres un analista financiero especializado en fondos mutuos en Chile."}
 
 # ===============================
 # 🔍 Generar insight automático
@@ -65,17 +41,16 @@ if st.button("Generar Insight IA"):
         Datos:
         {contexto}
         """
-        with st.spinner("Analizando con GPT-4o-mini..."):
-            respuesta = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Eres un analista financiero especializado en fondos mutuos en Chile."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800
-            )
-        st.success(respuesta.choices[0].message.content)
-    except RateLimitError:
+        # El spinner sólo espera el primer trozo; el resto se va dibujando a medida que llega
+        partes = responder([SISTEMA, {"role": "user", "content": prompt}], cliente)
+        with st.spinner(f"Analizando con {INSIGHT_MODELO}..."):
+            texto = next(partes, "")
+        salida = st.empty()
+        salida.success(texto)
+        for parte in partes:
+            texto += parte
+            salida.success(texto)
+    except SinCredito:
         st.error("⚠️ No hay crédito disponible en la cuenta de OpenAI.")
 
 # ===============================
@@ -99,20 +74,16 @@ if pregunta:
     try:
         prompt_chat = f"Usa estos datos de contexto:\n{contexto}\n\nPregunta: {pregunta}"
         with st.chat_message("assistant"):
+            partes = responder([
+                SISTEMA,
+                *[{"role": m["role"], "content": m["content"]} for m in st.session_state.chat_historial],
+                {"role": "user", "content": prompt_chat}
+            ], cliente)
             with st.spinner("Analizando..."):
-                respuesta_chat = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": "Eres un analista financiero especializado en fondos mutuos en Chile."},
-                        *[{"role": m["role"], "content": m["content"]} for m in st.session_state.chat_historial],
-                        {"role": "user", "content": prompt_chat}
-                    ],
-                    max_tokens=800
-                )
-                output = respuesta_chat.choices[0].message.content
-                st.markdown(output)
-                st.session_state.chat_historial.append({"role": "assistant", "content": output})
-    except RateLimitError:
+                primera = next(partes, "")
+            output = st.write_stream(itertools.chain([primera], partes))
+            st.session_state.chat_historial.append({"role": "assistant", "content": output})
+    except SinCredito:
         st.error("⚠️ No hay crédito disponible en la cuenta de OpenAI.")
 
 # ===============================
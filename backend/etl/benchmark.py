@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+import contextlib
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ===============================
+# 🧪 Benchmark del ETL con datos sintéticos
+# ===============================
+# Uso:
+#   python -m etl.benchmark --filas 1M,10M --db sqlite:////tmp/bench.db
+#   python -m etl.benchmark --filas 50M --estrategias copy,copy_paralelo --db postgresql://...
+
+ESTRATEGIAS = {
+    "multi": {"metodo": "multi", "workers": 1},
+    "copy": {"metodo": "copy", "workers": 1},
+    "copy_paralelo": {"metodo": "copy", "workers": 4},
+}
+
+TABLA_BENCH = "bench_fondos_mutuos"
+
+ADMINISTRADORAS = ["BANCHILE", "BCI", "SANTANDER", "SECURITY", "LARRAINVIAL", "SURA", "PRINCIPAL", "ZURICH"]
+CATEGORIAS = [
+    ("Fondos de Deuda < 90 Dias Nacional", "Deuda < 90 días"),
+    ("Fondos de Deuda < 365 Dias Nacional en pesos", "Deuda < 365 días"),
+    ("Fondos de Deuda > 365 Dias Nacional, Inversion en UF > 5 años", "Deuda > 365 días"),
+    ("Balanceado Conservador", "Balanceado"),
+    ("Balanceado Agresivo", "Balanceado"),
+    ("Accionario Nacional Large CAP", "Accionario"),
+    ("Accionario EEUU", "Accionario"),
+]
+TIPOS_FM = ["Deuda CP <= 90 días", "Deuda MP y LP", "Mixto", "Capitalización", "Libre Inversión"]
+SERIES = ["A", "B", "APV"]
+
+def parsear_filas(texto):
+    texto = texto.strip().upper()
+    multiplicador = {"K": 1_000, "M": 1_000_000}.get(texto[-1], 1)
+    return int(float(texto.rstrip("KM")) * multiplicador)
+
+# ===============================
+# 🏭 Generador sintético (por bloques de días, memoria acotada)
+# ===============================
+def generar_sintetico(ruta, filas, fondos=1500, seed=0, filas_por_grupo=500_000):
+    rng = np.random.default_rng(seed)
+    por_dia = fondos * len(SERIES)
+    dias = -(-filas // por_dia)
+    inicio = np.datetime64("2010-01-01")
+
+    run_fm = np.arange(8000, 8000 + fondos)
+    adm = np.array(ADMINISTRADORAS)[run_fm % len(ADMINISTRADORAS)]
+    cat_idx = run_fm % len(CATEGORIAS)
+    categoria = np.array([c for c, _ in CATEGORIAS])[cat_idx]
+    categoria_agrupada = np.array([g for _, g in CATEGORIAS])[cat_idx]
+    tipo = np.array(TIPOS_FM)[run_fm % len(TIPOS_FM)]
+    nombre = np.array([f"FONDO SINTETICO {r}" for r in run_fm])
+
+    # Una fila por fondo × serie; se repite para cada día del bloque
+    base = {
+        "run_fm": np.repeat(run_fm, len(SERIES)),
+        "serie": np.tile(SERIES, fondos),
+        "nombre_corto": np.repeat(nombre, len(SERIES)),
+        "nom_adm": np.repeat(adm, len(SERIES)),
+        "categoria": np.repeat(categoria, len(SERIES)),
+        "categoria_agrupada": np.repeat(categoria_agrupada, len(SERIES)),
+        "tipo_fm": np.repeat(tipo, len(SERIES)),
+    }
+    base["run_fm_nombrecorto"] = np.char.add(np.char.add(base["run_fm"].astype(str), " - "), base["nombre_corto"])
+
+    dias_por_bloque = max(1, filas_por_grupo // por_dia)
+    escritas = 0
+    writer = None
+    try:
+        for d0 in range(0, dias, dias_por_bloque):
+            n_dias = min(dias_por_bloque, dias - d0)
+            n = min(n_dias * por_dia, filas - escritas)
+            fechas = np.repeat(inicio + np.arange(d0, d0 + n_dias), por_dia)[:n]
+            aportes = rng.gamma(1.5, 20.0, n)
+            rescates = rng.gamma(1.5, 20.0, n)
+            columnas = {
+                "fecha_inf": fechas.astype("datetime64[us]"),
+                **{k: np.tile(v, n_dias)[:n] for k, v in base.items()},
+                "patrimonio_neto_mm": rng.lognormal(8, 1.5, n),
+                "venta_neta_mm": aportes - rescates,
+                "aportes_mm": aportes,
+                "rescates_mm": rescates,
+            }
+            tabla = pa.table(columnas)
+            if writer is None:
+                writer = pq.ParquetWriter(ruta, tabla.schema)
+            writer.write_table(tabla, row_group_size=filas_por_grupo)
+            escritas += n
+    finally:
+        if writer is not None:
+            writer.close()
+    return escritas
+
+# ===============================
+# 📏 Medición: tiempo y RSS pico por etapa
+# ===============================
+def rss_actual_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # Sin /proc (macOS): pico del proceso completo
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo / 2**20 if sys.platform == "darwin" else maximo / 2**10
+
+class Medicion:
+    def __init__(self, intervalo=0.05):
+        self.intervalo = intervalo
+        self.pico_mb = 0.0
+        self._parar = threading.Event()
+
+    def _muestrear(self):
+        while not self._parar.is_set():
+            self.pico_mb = max(self.pico_mb, rss_actual_mb())
+            self._parar.wait(self.intervalo)
+
+    def __enter__(self):
+        self.pico_mb = rss_actual_mb()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.segundos = time.perf_counter() - self.inicio
+        self._parar.set()
+        self._hilo.join()
+        self.pico_mb = max(self.pico_mb, rss_actual_mb())
+
+def medir(etapa, filas, funcion, verbose=False):
+    with open(os.devnull, "w") as nulo, \
+            (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(nulo)), Medicion() as m:
+        resultado = funcion()
+    fila = {
+        "etapa": etapa,
+        "filas": filas,
+        "segundos": round(m.segundos, 2),
+        "filas_por_segundo": round(filas / m.segundos) if m.segundos > 0 else None,
+        "rss_pico_mb": round(m.pico_mb, 1),
+    }
+    print(f"⏱️ {etapa:<28} {filas:>12,} filas {m.segundos:>9.2f}s "
+          f"{fila['filas_por_segundo'] or 0:>12,} filas/s  RSS pico {m.pico_mb:>8.1f} MB")
+    return fila, resultado
+
+# ===============================
+# 🏃 Corrida
+# ===============================
+def correr(tamanos, estrategias, db_url, directorio, verbose=False):
+    # El pipeline toma la URL al importarse
+    os.environ["DATABASE_PUBLIC_URL"] = db_url
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        from etl import pipeline
+        from etl.dataset import escribir_dataset_particionado
+    from sqlalchemy import text
+
+    resultados = []
+    for filas in tamanos:
+        print(f"\n🧪 Benchmark con {filas:,} filas ({pipeline.engine.dialect.name})")
+        ruta = os.path.join(directorio, f"bench_{filas}.parquet")
+        fila, _ = medir("generar_sintetico", filas, lambda: generar_sintetico(ruta, filas), verbose)
+        resultados.append(fila)
+
+        for nombre in estrategias:
+            config = ESTRATEGIAS[nombre]
+            fila, resultado = medir(
+                f"carga_{nombre}", filas,
+                lambda: pipeline.procesar_parquet_por_chunks(ruta, TABLA_BENCH, modo="completo", **config),
+                verbose,
+            )
+            if (resultado or {}).get("estado") != "ok":
+                print(f"❌ {nombre} falló: {(resultado or {}).get('error')}")
+            resultados.append(fila)
+
+        # Misma fuente, sin cambios: debería ser casi gratis (hash + watermark)
+        fila, _ = medir("incremental_sin_cambios", filas,
+                        lambda: pipeline.procesar_parquet_por_chunks(ruta, TABLA_BENCH, modo="incremental"),
+                        verbose)
+        resultados.append(fila)
+
+        ruta_dataset = os.path.join(directorio, f"bench_{filas}_dataset")
+        fila, _ = medir("dataset_particionado", filas,
+                        lambda: escribir_dataset_particionado(ruta, ruta_dataset), verbose)
+        resultados.append(fila)
+
+        with pipeline.engine.begin() as conn:
+            for tabla in [TABLA_BENCH, f"{TABLA_BENCH}_diario", f"{TABLA_BENCH}_fondo_mes"]:
+                conn.execute(text(f'DROP TABLE IF EXISTS "{tabla}"'))
+            conn.execute(text("DELETE FROM etl_cargas WHERE tabla = :t"), {"t": TABLA_BENCH})
+        os.remove(ruta)
+
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del ETL de fondos mutuos")
+    parser.add_argument("--filas", default="1M", help="Tamaños separados por coma (ej. 1M,10M,50M)")
+    parser.add_argument("--estrategias", default=",".join(ESTRATEGIAS), help="Estrategias de carga a medir")
+    parser.add_argument("--db", default=None, help="URL de la base (por defecto SQLite temporal)")
+    parser.add_argument("--dir", default=None, help="Directorio de trabajo para los parquet sintéticos")
+    parser.add_argument("--json", default=None, help="Guardar resultados en este archivo")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar la salida del pipeline")
+    args = parser.parse_args()
+
+    directorio = args.dir or tempfile.mkdtemp(prefix="ffmm_bench_")
+    os.makedirs(directorio, exist_ok=True)
+    db_url = args.db or f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+    estrategias = [e.strip() for e in args.estrategias.split(",") if e.strip()]
+    desconocidas = [e for e in estrategias if e not in ESTRATEGIAS]
+    if desconocidas:
+        parser.error(f"Estrategias desconocidas: {desconocidas}. Opciones: {list(ESTRATEGIAS)}")
+
+    resultados = correr([parsear_filas(f) for f in args.filas.split(",")], estrategias, db_url, directorio, args.verbose)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"💾 Resultados en {args.json}")
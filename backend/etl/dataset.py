@@ -0,0 +1,60 @@
+import os
+import shutil
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# 🔍 Dataset particionado estilo Hive: ffmm_dataset/anio=2025/mes=7/part-0.parquet
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARQUET_PATH = os.path.join(BASE_DIR, "../data_fuentes/ffmm_merged.parquet")
+DATASET_PATH = os.path.join(BASE_DIR, "../data_fuentes/ffmm_dataset")
+
+# ⚙️ Particionar además por tipo_fm (anio/mes/tipo_fm)
+PARTICION_TIPO = os.getenv("ETL_PARTICION_TIPO", "0") == "1"
+
+def _batches_con_particion(parquet, batch_size):
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        fechas = batch.column(batch.schema.get_field_index("fecha_inf"))
+        anio = pc.year(fechas).cast(pa.int16())
+        mes = pc.month(fechas).cast(pa.int8())
+        yield pa.RecordBatch.from_arrays(list(batch.columns) + [anio, mes],
+                                         names=batch.schema.names + ["anio", "mes"])
+
+def escribir_dataset_particionado(ruta_parquet=PARQUET_PATH, destino=DATASET_PATH,
+                                  por_tipo=PARTICION_TIPO, batch_size=100_000):
+    print(f"🗂️ Escribiendo dataset particionado en {destino}...")
+    parquet = pq.ParquetFile(ruta_parquet)
+    esquema = parquet.schema_arrow.remove_metadata()
+    if "fecha_inf" not in esquema.names:
+        raise ValueError(f"{ruta_parquet} no tiene columna fecha_inf")
+
+    esquema = esquema.append(pa.field("anio", pa.int16())).append(pa.field("mes", pa.int8()))
+    campos = ["anio", "mes"] + (["tipo_fm"] if por_tipo and "tipo_fm" in esquema.names else [])
+    particion = ds.partitioning(pa.schema([esquema.field(c) for c in campos]), flavor="hive")
+
+    # Se escribe en un directorio temporal y se reemplaza al final: el dashboard nunca ve un dataset a medias
+    tmp = destino + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    ds.write_dataset(
+        _batches_con_particion(parquet, batch_size),
+        tmp,
+        schema=esquema,
+        format="parquet",
+        partitioning=particion,
+        max_rows_per_group=batch_size,
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+    viejo = destino + ".old"
+    shutil.rmtree(viejo, ignore_errors=True)
+    if os.path.isdir(destino):
+        os.replace(destino, viejo)
+    os.replace(tmp, destino)
+    shutil.rmtree(viejo, ignore_errors=True)
+
+    print(f"✅ Dataset particionado por {'/'.join(campos)}: {parquet.metadata.num_rows} filas")
+    return destino
+
+if __name__ == "__main__":
+    escribir_dataset_particionado()
@@ -0,0 +1,85 @@
+from datetime import date
+from sqlalchemy import (MetaData, Table, Column, Index, PrimaryKeyConstraint, Integer,
+                        String, Text, Date, Float, text, inspect)
+
+# ===============================
+# 🧱 Esquema de fondos_mutuos
+# ===============================
+metadata_fondos = MetaData()
+
+def definir_tabla_fondos(nombre="fondos_mutuos", metadata=metadata_fondos):
+    if nombre in metadata.tables:
+        return metadata.tables[nombre]
+    return Table(
+        nombre, metadata,
+        Column("fecha_inf", Date, nullable=False),
+        Column("run_fm", Integer, nullable=False),
+        Column("serie", String(20), nullable=False),
+        Column("nombre_corto", Text),
+        Column("run_fm_nombrecorto", Text),
+        Column("fondo", Text),
+        Column("nom_adm", Text),
+        Column("raz_social_adm", Text),
+        Column("categoria", Text),
+        Column("categoria_agrupada", Text),
+        Column("tipo_fm", Text),
+        Column("moneda", String(10)),
+        Column("serie_apv", String(5)),
+        Column("valor_cuota", Float(precision=53)),
+        Column("num_participes", Integer),
+        Column("patrimonio_neto_mm", Float(precision=53)),
+        Column("venta_neta_mm", Float(precision=53)),
+        Column("aportes_mm", Float(precision=53)),
+        Column("rescates_mm", Float(precision=53)),
+        # La clave natural incluye fecha_inf: en Postgres la PK debe contener la columna de partición
+        PrimaryKeyConstraint("run_fm", "serie", "fecha_inf", name=f"pk_{nombre}"),
+        Index(f"ix_{nombre}_fecha_inf", "fecha_inf", postgresql_using="brin"),
+        # Orden de la paginación por cursor de la API (/fondos)
+        Index(f"ix_{nombre}_orden", "fecha_inf", "run_fm", "serie"),
+        Index(f"ix_{nombre}_run_fm", "run_fm"),
+        Index(f"ix_{nombre}_nom_adm", "nom_adm"),
+        postgresql_partition_by="RANGE (fecha_inf)",
+    )
+
+tabla_fondos_mutuos = definir_tabla_fondos()
+
+def crear_tabla_fondos(engine, nombre="fondos_mutuos"):
+    tabla = definir_tabla_fondos(nombre)
+    tabla.create(engine, checkfirst=True)
+    return tabla
+
+# ===============================
+# 📅 Particiones mensuales (sólo Postgres)
+# ===============================
+def inicio_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+def mes_siguiente(fecha):
+    return date(fecha.year + fecha.month // 12, fecha.month % 12 + 1, 1)
+
+def nombre_particion(tabla, mes):
+    return f"{tabla}_{mes.year:04d}_{mes.month:02d}"
+
+def es_particionada(engine, tabla):
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:t))"),
+            {"t": f'"{tabla}"'},
+        ).scalar()
+
+def asegurar_particiones(engine, tabla, meses):
+    creadas = []
+    with engine.begin() as conn:
+        for mes in sorted({inicio_mes(m) for m in meses}):
+            particion = nombre_particion(tabla, mes)
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{particion}" PARTITION OF "{tabla}" '
+                f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{mes_siguiente(mes).isoformat()}')"
+            ))
+            creadas.append(particion)
+    return creadas
+
+def columnas_tabla(engine, tabla):
+    return {c["name"]: c["type"] for c in inspect(engine).get_columns(tabla)}
@@ -0,0 +1,255 @@
+import os
+import re
+import glob
+import json
+import hashlib
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from etl.dataset import escribir_dataset_particionado
+
+# 🔍 Rutas de las fuentes CMF y del parquet consolidado
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FUENTES_DIR = os.path.join(BASE_DIR, "../data_fuentes")
+PARQUET_PATH = os.path.join(FUENTES_DIR, "ffmm_merged.parquet")
+
+# 📋 Columnas de la hoja "Base" del resumen diario (por posición: el encabezado viene con acentos rotos)
+COLUMNAS_RESUMEN = [
+    "nom_adm", "run", "codigo_bloomberg", "fondo", "serie", "patrimonio_neto",
+    "cuotas_en_circulacion", "cuotas_aportadas", "cuotas_rescatadas", "valor_cuota",
+    "num_participes", "categoria", "serie_apv", "moneda",
+]
+
+# 🏷️ Tipos de fondo mutuo según la clasificación CMF (columna "Tipo de Fondo Mutuo" de fm_ident)
+TIPOS_FM = {
+    "1": "Deuda CP <= 90 días",
+    "2": "Deuda CP <= 365 días",
+    "3": "Deuda MP y LP",
+    "4": "Mixto",
+    "5": "Capitalización",
+    "6": "Libre Inversión",
+    "7": "Estructurado",
+    "8": "Inversionistas Calificados",
+}
+
+# 🧺 Agrupación de categorías AAFM por prefijo
+CATEGORIAS_AGRUPADAS = [
+    ("Fondos de Deuda < 90", "Deuda < 90 días"),
+    ("Fondos de Deuda < 365", "Deuda < 365 días"),
+    ("Fondos de Deuda > 365", "Deuda > 365 días"),
+    ("Balanceado", "Balanceado"),
+    ("Accionario", "Accionario"),
+    ("Inversionistas Calificados", "Inversionistas Calificados"),
+    ("Estructurado", "Estructurado"),
+    ("S/C", "Sin Clasificar"),
+]
+
+def hash_archivo(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+# Sin moneda informada se asume pesos (la columna "Patrimonio Neto ($)" viene con valor)
+def en_pesos(df):
+    return df["moneda"].isna() | (df["moneda"] == "PESOS")
+
+def agrupar_categoria(categoria):
+    if not isinstance(categoria, str):
+        return None
+    for prefijo, grupo in CATEGORIAS_AGRUPADAS:
+        if categoria.startswith(prefijo):
+            return grupo
+    return "Otros"
+
+# ===============================
+# 📖 Lectores en streaming (fila a fila)
+# ===============================
+def filas_xlsx(ruta):
+    from openpyxl import load_workbook
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+def filas_xls(ruta):
+    import xlrd
+    with open(os.devnull, "w") as silencio:
+        wb = xlrd.open_workbook(ruta, on_demand=True, logfile=silencio)
+        try:
+            hoja = wb.sheet_by_index(0)
+            for i in range(hoja.nrows):
+                yield tuple(v if v != "" else None for v in hoja.row_values(i))
+        finally:
+            wb.release_resources()
+
+def parsear_resumen_diario(ruta):
+    filas = filas_xlsx(ruta) if ruta.endswith(".xlsx") else filas_xls(ruta)
+    fecha = None
+    registros = []
+    en_tabla = False
+
+    for fila in filas:
+        primera = fila[0] if fila else None
+        if not en_tabla:
+            if isinstance(primera, str) and fecha is None:
+                m = re.search(r"(\d{2}/\d{2}/\d{4})", primera)
+                if m:
+                    fecha = datetime.strptime(m.group(1), "%d/%m/%Y")
+            if primera == "Administradora":
+                en_tabla = True
+            continue
+        if primera is None:
+            # La tabla termina en la primera fila vacía
+            break
+        registros.append(fila[:len(COLUMNAS_RESUMEN)])
+
+    if fecha is None:
+        raise ValueError(f"No se encontró el período en {ruta}")
+
+    df = pd.DataFrame.from_records(registros, columns=COLUMNAS_RESUMEN)
+    df["fecha_inf"] = pd.Timestamp(fecha)
+    df["run_fm"] = df["run"].astype(str).str.split("-").str[0].astype("int64")
+    # Fondos de serie única vienen sin nombre de serie
+    df["serie"] = df["serie"].fillna("UNICA").astype(str)
+    for col in ["patrimonio_neto", "cuotas_en_circulacion", "cuotas_aportadas",
+                "cuotas_rescatadas", "valor_cuota", "num_participes"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["num_participes"] = df["num_participes"].round().astype("Int64")
+
+    # Montos en millones, en la moneda del fondo (ver columna "moneda"); montos_en_pesos los pasa a CLP.
+    # "Patrimonio Neto ($)" viene en 0 para los fondos en otra moneda: se calcula con cuotas × valor cuota
+    patrimonio = df["patrimonio_neto"].where(en_pesos(df), df["cuotas_en_circulacion"] * df["valor_cuota"])
+    df["patrimonio_neto_mm"] = patrimonio / 1e6
+    df["aportes_mm"] = df["cuotas_aportadas"].fillna(0) * df["valor_cuota"] / 1e6
+    df["rescates_mm"] = df["cuotas_rescatadas"].fillna(0) * df["valor_cuota"] / 1e6
+    df["venta_neta_mm"] = df["aportes_mm"] - df["rescates_mm"]
+    df["categoria_agrupada"] = df["categoria"].map(agrupar_categoria)
+
+    return df[[
+        "fecha_inf", "run_fm", "serie", "nom_adm", "fondo", "categoria", "categoria_agrupada",
+        "moneda", "serie_apv", "valor_cuota", "num_participes",
+        "patrimonio_neto_mm", "aportes_mm", "rescates_mm", "venta_neta_mm",
+    ]]
+
+def parsear_fm_ident(ruta):
+    df = pd.read_csv(
+        ruta, sep=";", dtype=str,
+        usecols=["RUN Fondo", "Nombre Corto", "Raz. Social Administradora",
+                 "Tipo de Fondo Mutuo", "Fecha Inicio Operaciones"],
+    )
+    df = df.drop_duplicates()
+    df["fecha_inicio"] = pd.to_datetime(df["Fecha Inicio Operaciones"], format="%d/%m/%Y", errors="coerce")
+    # Un RUN puede repetirse (reinscripciones): se queda el registro más reciente
+    df = df.sort_values("fecha_inicio").drop_duplicates("RUN Fondo", keep="last")
+
+    return pd.DataFrame({
+        "run_fm": df["RUN Fondo"].astype("int64"),
+        "nombre_corto": df["Nombre Corto"].str.strip(),
+        "raz_social_adm": df["Raz. Social Administradora"].str.strip(),
+        "tipo_fm": df["Tipo de Fondo Mutuo"].map(TIPOS_FM).fillna(df["Tipo de Fondo Mutuo"]),
+    })
+
+# 💱 Dólar observado (opcional): dolar_observado*.csv con columnas fecha y valor (CLP por USD)
+def parsear_dolar_observado(ruta):
+    df = pd.read_csv(ruta, sep=None, engine="python", dtype=str)
+    df.columns = [c.strip().lower() for c in df.columns]
+    return pd.DataFrame({
+        "fecha_inf": pd.to_datetime(df["fecha"].str.strip(), dayfirst=True, format="mixed"),
+        "dolar": pd.to_numeric(df["valor"].str.strip().str.replace(",", ".", regex=False), errors="coerce"),
+    }).dropna().sort_values("fecha_inf", ignore_index=True)
+
+# Montos en MM CLP para todo el dataset. Las series en dólares usan el último dólar observado
+# a la fecha; las que no tienen tipo de cambio quedan sin montos (nulos, fuera de las sumas)
+def montos_en_pesos(resumen, dolar=None):
+    montos = ["patrimonio_neto_mm", "aportes_mm", "rescates_mm", "venta_neta_mm"]
+    resumen = resumen.reset_index(drop=True)
+    factor = pd.Series(1.0, index=resumen.index).where(en_pesos(resumen))
+    en_dolares = resumen["moneda"] == "DOLAR"
+    if dolar is not None and en_dolares.any():
+        tasas = pd.merge_asof(resumen.loc[en_dolares, ["fecha_inf"]].astype("datetime64[us]").reset_index(),
+                              dolar.astype({"fecha_inf": "datetime64[us]"}), on="fecha_inf",
+                              direction="backward").set_index("index")["dolar"]
+        factor.loc[en_dolares] = tasas
+    sin_tasa = factor.isna()
+    if sin_tasa.any():
+        monedas = ", ".join(sorted(resumen.loc[sin_tasa, "moneda"].astype(str).unique()))
+        print(f"⚠️ {sin_tasa.sum()} filas ({monedas}) sin tipo de cambio: quedan sin montos")
+    resumen[montos] = resumen[montos].mul(factor, axis=0)
+    return resumen
+
+# ===============================
+# 💾 Caché de conversiones por hash de archivo
+# ===============================
+# Subir al cambiar lo que devuelven los parsers: invalida las conversiones guardadas
+VERSION_CONVERSION = 2
+
+def convertir_con_cache(ruta, parser, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    h = hash_archivo(ruta)
+    ruta_cache = os.path.join(cache_dir, f"{h}.v{VERSION_CONVERSION}.parquet")
+
+    if os.path.exists(ruta_cache):
+        print(f"♻️ {os.path.basename(ruta)} sin cambios, usando caché")
+    else:
+        print(f"🔄 Convirtiendo {os.path.basename(ruta)}...")
+        parser(ruta).to_parquet(ruta_cache, index=False)
+    return h, ruta_cache
+
+def construir_parquet_merged(fuentes_dir=FUENTES_DIR, destino=PARQUET_PATH):
+    print("🏗️ Construyendo ffmm_merged.parquet desde fuentes CMF...")
+    resumenes = sorted(glob.glob(os.path.join(fuentes_dir, "resumen_diario*.xls*")))
+    identificaciones = sorted(glob.glob(os.path.join(fuentes_dir, "fm_ident_*.txt")))
+    if not resumenes or not identificaciones:
+        print(f"❌ Faltan fuentes en {fuentes_dir} (resumen_diario*.xls[x] y fm_ident_*.txt; "
+              "dolar_observado*.csv es opcional)")
+        return None
+
+    # Cada fuente convertida queda en .cache/<sha256>.parquet: un Excel sin cambios no se vuelve a parsear
+    cache_dir = os.path.join(fuentes_dir, ".cache")
+    # El fm_ident más reciente (el nombre lleva timestamp)
+    hash_ident, cache_ident = convertir_con_cache(identificaciones[-1], parsear_fm_ident, cache_dir)
+    convertidos = [convertir_con_cache(r, parsear_resumen_diario, cache_dir) for r in resumenes]
+
+    dolares = sorted(glob.glob(os.path.join(fuentes_dir, "dolar_observado*.csv")))
+    hash_dolar, cache_dolar = (convertir_con_cache(dolares[-1], parsear_dolar_observado, cache_dir)
+                               if dolares else (None, None))
+
+    manifiesto = {"version": VERSION_CONVERSION, "fm_ident": hash_ident, "dolar": hash_dolar,
+                  "resumenes": sorted(h for h, _ in convertidos)}
+    ruta_manifiesto = os.path.join(cache_dir, "manifiesto.json")
+    ruta_dataset = os.path.join(os.path.dirname(destino), "ffmm_dataset")
+    if os.path.exists(destino) and os.path.exists(ruta_manifiesto):
+        with open(ruta_manifiesto) as f:
+            if json.load(f) == manifiesto:
+                print("⏭️ Fuentes sin cambios: ffmm_merged.parquet ya está al día")
+                if not os.path.isdir(ruta_dataset):
+                    escribir_dataset_particionado(destino, ruta_dataset)
+                return destino
+
+    ident = pd.read_parquet(cache_ident)
+    resumen = pd.concat([pd.read_parquet(c) for _, c in convertidos], ignore_index=True)
+    # El mismo día puede venir en .xls y .xlsx
+    resumen = resumen.drop_duplicates(["run_fm", "serie", "fecha_inf"], keep="last")
+    resumen = montos_en_pesos(resumen, pd.read_parquet(cache_dolar) if cache_dolar else None)
+
+    merged = resumen.merge(ident, on="run_fm", how="left")
+    merged["nombre_corto"] = merged["nombre_corto"].fillna(merged["fondo"])
+    merged["run_fm_nombrecorto"] = merged["run_fm"].astype(str) + " - " + merged["nombre_corto"].astype(str)
+    merged = merged.sort_values(["fecha_inf", "run_fm", "serie"], ignore_index=True)
+
+    tmp = destino + ".tmp"
+    pq.write_table(pa.Table.from_pandas(merged, preserve_index=False), tmp, row_group_size=100_000)
+    os.replace(tmp, destino)
+    escribir_dataset_particionado(destino, ruta_dataset)
+    with open(ruta_manifiesto, "w") as f:
+        json.dump(manifiesto, f)
+
+    print(f"✅ {destino}: {len(merged)} filas, {merged['fecha_inf'].nunique()} días")
+    return destino
+
+if __name__ == "__main__":
+    construir_parquet_merged()
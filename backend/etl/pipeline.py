@@ -1,9 +1,24 @@
 import os
+import io
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import unicodedata
 import traceback
-from sqlalchemy import create_engine, text, inspect
-from sqlalchemy.exc import SQLAlchemyError
+import psycopg2
+from sqlalchemy import (create_engine, text, inspect, MetaData, Table, Column,
+                        Integer, BigInteger, String, DateTime, select)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError, DBAPIError, IntegrityError
+from etl.rollups import actualizar_rollups
+from etl.fuentes import hash_archivo
+from etl.esquema import crear_tabla_fondos, es_particionada, asegurar_particiones, columnas_tabla
 
 DB_URL = os.getenv("DATABASE_PUBLIC_URL") or os.getenv("DATABASE_URL")
 if not DB_URL:
@@ -16,6 +31,32 @@ print(f"🔗 Usando URL: {DB_URL}")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PARQUET_PATH = os.path.join(BASE_DIR, "../data_fuentes/ffmm_merged.parquet")
 
+# ⚙️ Método de carga: "copy" (COPY FROM STDIN en Postgres) o "multi" (INSERT multi-fila)
+METODO_CARGA = os.getenv("ETL_METODO_CARGA", "copy")
+
+# 🧵 Carga paralela: hilos (cada uno con su conexión del pool) y reintentos por chunk
+# Por defecto secuencial: contra una base local COPY ya satura el disco y los hilos sólo suman
+# contención (etl/benchmark.py: copy_paralelo más lento que copy). Conviene subirlo con una base
+# remota, donde cada chunk espera la red.
+WORKERS = int(os.getenv("ETL_WORKERS", "1"))
+REINTENTOS_CHUNK = int(os.getenv("ETL_REINTENTOS", "3"))
+
+# 🔑 Clave natural de una fila: un fondo/serie por día
+CLAVE_NATURAL = ["run_fm", "serie", "fecha_inf"]
+
+# 🕓 Registro de cargas (watermark por archivo y tabla)
+metadata_etl = MetaData()
+etl_cargas = Table(
+    "etl_cargas", metadata_etl,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("tabla", String(128), nullable=False),
+    Column("archivo", String(255), nullable=False),
+    Column("hash_contenido", String(64), nullable=False),
+    Column("fecha_max", DateTime),
+    Column("filas", BigInteger),
+    Column("cargado_en", DateTime, nullable=False),
+)
+
 def limpiar_nombre(col):
     col = unicodedata.normalize('NFKD', col).encode('ascii', 'ignore').decode('ascii')
     col = ''.join(c if c.isalnum() else '_' for c in col)
@@ -33,41 +74,323 @@ def hacer_unicas(cols):
             nuevas.append(f"{c}_{seen[c]}")
     return nuevas
 
+def mapear_columnas(nombres):
+    return hacer_unicas([limpiar_nombre(c) for c in nombres])
+
+# 🌊 Lee el parquet por record batches: en memoria vive sólo un chunk a la vez
+def iterar_chunks(parquet, columnas, chunk_size=50000, originales=None, desde=None):
+    row_groups = row_groups_desde(parquet, columnas, desde)
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=originales, row_groups=row_groups):
+        chunk = batch.to_pandas()
+        chunk.columns = columnas
+        if desde is not None:
+            chunk = chunk[pd.to_datetime(chunk["fecha_inf"]) >= pd.Timestamp(desde)]
+            if chunk.empty:
+                continue
+        yield chunk
+
 def tabla_existe(tabla):
     inspector = inspect(engine)
     return tabla in inspector.get_table_names()
 
+def ultima_carga(tabla, archivo):
+    consulta = (
+        select(etl_cargas)
+        .where(etl_cargas.c.tabla == tabla, etl_cargas.c.archivo == archivo)
+        .order_by(etl_cargas.c.id.desc())
+        .limit(1)
+    )
+    with engine.connect() as conn:
+        return conn.execute(consulta).mappings().first()
+
+def registrar_carga(tabla, archivo, hash_contenido, fecha_max, filas):
+    with engine.begin() as conn:
+        conn.execute(etl_cargas.insert().values(
+            tabla=tabla, archivo=archivo, hash_contenido=hash_contenido,
+            fecha_max=fecha_max, filas=filas, cargado_en=datetime.now(),
+        ))
+
+def crear_indice_clave(tabla):
+    # Las tablas creadas con etl/esquema.py ya tienen la clave natural como PK
+    if inspect(engine).get_pk_constraint(tabla).get("constrained_columns") == CLAVE_NATURAL:
+        return
+    columnas = ", ".join(f'"{c}"' for c in CLAVE_NATURAL)
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "ux_{tabla}_clave" ON "{tabla}" ({columnas});'))
+
+# Tablas creadas antes del índice de paginación de /fondos
+def crear_indice_orden(tabla):
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_{tabla}_orden" ON "{tabla}" ("fecha_inf", "run_fm", "serie");'))
+
+# ⏩ Row groups cuyo máximo de fecha_inf es anterior al watermark se saltan sin leerlos
+def row_groups_desde(parquet, columnas, desde):
+    if desde is None or "fecha_inf" not in columnas:
+        return None
+    idx = parquet.schema_arrow.get_field_index(parquet.schema_arrow.names[columnas.index("fecha_inf")])
+    grupos = []
+    for i in range(parquet.num_row_groups):
+        stats = parquet.metadata.row_group(i).column(idx).statistics
+        try:
+            if stats is not None and stats.has_min_max and pd.Timestamp(stats.max) < pd.Timestamp(desde):
+                continue
+        except (TypeError, ValueError):
+            pass
+        grupos.append(i)
+    return grupos
+
+# 🚚 Envía el chunk con COPY ... FROM STDIN (CSV serializado por pyarrow, no fila a fila en Python)
+def insertar_copy(conn, chunk, tabla):
+    tabla_arrow = pa.Table.from_pandas(chunk, preserve_index=False)
+    tabla_arrow = tabla_arrow.cast(pa.schema([
+        pa.field(f.name, f.type.value_type) if pa.types.is_dictionary(f.type) else f
+        for f in tabla_arrow.schema
+    ]))
+    buffer = io.BytesIO()
+    pa_csv.write_csv(tabla_arrow, buffer, pa_csv.WriteOptions(include_header=False))
+    buffer.seek(0)
+
+    columnas = ", ".join(f'"{c}"' for c in chunk.columns)
+    sql = f'COPY "{tabla}" ({columnas}) FROM STDIN WITH (FORMAT csv)'
+    with conn.connection.cursor() as cur:
+        try:
+            cur.copy_expert(sql, buffer)
+        except psycopg2.Error as e:
+            # El cursor crudo no pasa por SQLAlchemy: se envuelve para que reintentos y errores se manejen igual
+            raise DBAPIError.instance(sql, None, e, psycopg2.Error) from e
+        return cur.rowcount
+
+# 🔁 Método para DataFrame.to_sql: INSERT ... ON CONFLICT (clave natural) DO UPDATE
+def insertar_upsert(table, conn, keys, data_iter):
+    filas = [dict(zip(keys, fila)) for fila in data_iter]
+    if not filas:
+        return 0
+    insertar = pg_insert if conn.dialect.name == "postgresql" else sqlite_insert
+    stmt = insertar(table.table).values(filas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=CLAVE_NATURAL,
+        set_={k: stmt.excluded[k] for k in keys if k not in CLAVE_NATURAL},
+    )
+    return conn.execute(stmt).rowcount
+
+def resolver_metodo(metodo=METODO_CARGA):
+    if metodo == "copy":
+        if engine.dialect.name == "postgresql":
+            return insertar_copy
+        # SQLite y otros motores: executemany genérico de pandas
+        return None
+    if metodo == "multi":
+        return "multi"
+    raise ValueError(f"Método de carga no soportado: {metodo}")
+
+# 🧱 Alinea cada chunk con las columnas de la tabla y crea las particiones mensuales que falten
+def ajustar_a_tabla(chunks, tabla):
+    columnas = columnas_tabla(engine, tabla)
+    particionada = es_particionada(engine, tabla)
+    meses_creados = set()
+    avisado = False
+
+    for chunk in chunks:
+        sobrantes = [c for c in chunk.columns if c not in columnas]
+        if sobrantes and not avisado:
+            print(f"ℹ️ Columnas ignoradas (no existen en {tabla}): {sobrantes}")
+            avisado = True
+        chunk = chunk[[c for c in chunk.columns if c in columnas]]
+        # Enteros con nulos llegan como float desde parquet/pandas: COPY no acepta "1282.0" en INTEGER
+        for c in chunk.columns:
+            if isinstance(columnas[c], Integer) and pd.api.types.is_float_dtype(chunk[c]):
+                chunk = chunk.assign(**{c: chunk[c].round().astype("Int64")})
+
+        claves = [c for c in CLAVE_NATURAL if c in chunk.columns]
+        nulos = chunk[claves].isna().any(axis=1)
+        if nulos.any():
+            print(f"⚠️ Se descartan {int(nulos.sum())} filas sin clave ({', '.join(claves)})")
+            chunk = chunk[~nulos]
+
+        if particionada and "fecha_inf" in chunk.columns:
+            periodos = pd.to_datetime(chunk["fecha_inf"]).dt.to_period("M").unique()
+            meses = {p.start_time.date() for p in periodos if not pd.isna(p)}
+            nuevos = meses - meses_creados
+            if nuevos:
+                asegurar_particiones(engine, tabla, nuevos)
+                meses_creados |= nuevos
+        yield chunk
+
+# 📈 Acumula filas y fecha máxima a medida que se leen los chunks
+def resumir_chunks(chunks, resumen):
+    for chunk in chunks:
+        resumen["filas"] += len(chunk)
+        if "fecha_inf" in chunk.columns:
+            maximo = pd.to_datetime(chunk["fecha_inf"]).max()
+            if pd.notna(maximo) and (resumen["fecha_max"] is None or maximo > pd.Timestamp(resumen["fecha_max"])):
+                resumen["fecha_max"] = maximo.to_pydatetime()
+        yield chunk
+
+# Sólo se reintenta lo que puede pasar solo: conexión caída, timeout, base bloqueada.
+# Errores de datos o de SQL fallan igual en cada intento
+def es_transitorio(error):
+    if not isinstance(error, DBAPIError):
+        return False
+    if error.connection_invalidated:
+        return True
+    if isinstance(error.orig, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+        return True
+    return "database is locked" in str(error.orig)
+
+# pandas envuelve el error de la base en su DatabaseError: se devuelve el original (reintentos, PK duplicada)
+def insertar_to_sql(conn, chunk, tabla, metodo_sql):
+    try:
+        chunk.to_sql(tabla, conn, if_exists="append", index=False, method=metodo_sql,
+                     chunksize=1000 if metodo_sql in ("multi", insertar_upsert) else None)
+    except pd.errors.DatabaseError as e:
+        if isinstance(e.__cause__, SQLAlchemyError):
+            raise e.__cause__ from None
+        raise
+
+def insertar_chunk(motor, chunk, tabla, metodo_sql, n, reintentos=REINTENTOS_CHUNK):
+    for intento in range(1, reintentos + 1):
+        try:
+            with motor.begin() as conn:
+                if metodo_sql is insertar_copy:
+                    insertar_copy(conn, chunk, tabla)
+                else:
+                    insertar_to_sql(conn, chunk, tabla, metodo_sql)
+            return len(chunk)
+        except DBAPIError as e:
+            if intento == reintentos or not es_transitorio(e):
+                raise
+            espera = 2 ** (intento - 1)
+            print(f"⚠️ Chunk {n} falló (intento {intento}/{reintentos}): {e.orig}. Reintentando en {espera}s...")
+            time.sleep(espera)
+
+# 🧵 Inserta los chunks y devuelve (n, filas) en orden, con hasta `workers` chunks en paralelo
+def cargar_chunks(chunks, tabla, metodo_sql, workers=WORKERS):
+    if workers > 1 and engine.dialect.name == "sqlite":
+        print("ℹ️ SQLite no admite escrituras concurrentes: la carga será secuencial.")
+        workers = 1
+
+    chunks = enumerate(chunks, start=1)
+    if workers <= 1:
+        for n, chunk in chunks:
+            print(f"🔹 Insertando chunk {n}: {len(chunk)} filas")
+            yield n, insertar_chunk(engine, chunk, tabla, metodo_sql, n)
+        return
+
+    # El primer chunk va solo: crea la tabla antes de que lleguen los demás hilos
+    primero = next(chunks, None)
+    if primero is None:
+        return
+    n, chunk = primero
+    print(f"🔹 Insertando chunk {n}: {len(chunk)} filas")
+    yield n, insertar_chunk(engine, chunk, tabla, metodo_sql, n)
+
+    motor = create_engine(DB_URL, pool_size=workers, max_overflow=0, pool_pre_ping=True)
+    print(f"🧵 Carga paralela con {workers} workers")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pendientes = deque()
+            for n, chunk in chunks:
+                print(f"🔹 Encolando chunk {n}: {len(chunk)} filas")
+                pendientes.append((n, pool.submit(insertar_chunk, motor, chunk, tabla, metodo_sql, n)))
+                # Se limita lo que hay en vuelo para mantener la memoria acotada
+                while len(pendientes) >= 2 * workers:
+                    n_listo, futuro = pendientes.popleft()
+                    yield n_listo, futuro.result()
+            while pendientes:
+                n_listo, futuro = pendientes.popleft()
+                yield n_listo, futuro.result()
+    finally:
+        motor.dispose()
+
 def procesar_parquet_por_chunks(ruta_parquet=PARQUET_PATH,
                                 tabla_destino="fondos_mutuos",
-                                chunk_size=50000):
+                                chunk_size=50000,
+                                metodo=METODO_CARGA,
+                                modo="incremental",
+                                workers=WORKERS,
+                                al_progresar=None):
+    # modo: "incremental" (sólo días desde el último watermark, con upsert por clave natural),
+    # "completo" (recrea la tabla) o "append" (agrega todo: falla si las filas ya estaban, por la PK)
+    # al_progresar(filas_cargadas, filas_total, chunks): callback por chunk insertado (ver etl/worker.py)
     print("🚀 Iniciando carga batch por chunks desde parquet...")
     print(f"📂 Leyendo parquet: {ruta_parquet}")
 
     try:
-        df = pd.read_parquet(ruta_parquet, engine="pyarrow")
-        print(f"✅ Dataframe cargado: {len(df)} filas")
-        print(f"📝 Columnas originales: {list(df.columns)}")
+        parquet = pq.ParquetFile(ruta_parquet)
+        total = parquet.metadata.num_rows
+        print(f"✅ Parquet abierto: {total} filas en {parquet.num_row_groups} row groups")
+        originales = [c for c in parquet.schema_arrow.names if not c.startswith("__index_level_")]
+        print(f"📝 Columnas originales: {originales}")
 
-        df.columns = [limpiar_nombre(c) for c in df.columns]
-        df.columns = hacer_unicas(df.columns)
-        print(f"📝 Columnas finales: {list(df.columns)}")
+        columnas = mapear_columnas(originales)
+        print(f"📝 Columnas finales: {columnas}")
 
     except Exception as e:
         print(f"❌ Error al leer parquet: {e}")
-        return
+        return {"estado": "error", "error": f"Error al leer parquet: {e}"}
 
     try:
-        total = len(df)
+        archivo = os.path.basename(ruta_parquet)
+        hash_contenido = hash_archivo(ruta_parquet)
+        desde = None
 
-        if not tabla_existe(tabla_destino):
-            print(f"ℹ️ La tabla {tabla_destino} no existe. Se creará automáticamente con el primer chunk.")
+        metadata_etl.create_all(engine, tables=[etl_cargas])
 
-        for i in range(0, total, chunk_size):
-            chunk = df.iloc[i:i+chunk_size]
-            print(f"🔹 Insertando chunk {i//chunk_size + 1}: {len(chunk)} filas")
+        if modo == "incremental":
+            ultima = ultima_carga(tabla_destino, archivo) if tabla_existe(tabla_destino) else None
+            if ultima is not None and ultima["hash_contenido"] == hash_contenido:
+                print(f"⏭️ {archivo} sin cambios desde la última carga ({ultima['cargado_en']}). Nada que hacer.")
+                return {"estado": "sin_cambios", "filas": 0}
+            if ultima is None:
+                # Primera carga incremental: se recrea la tabla para partir sin duplicados
+                print("ℹ️ No hay watermark previo: se hará una carga completa.")
+                modo = "completo"
+            else:
+                desde = ultima["fecha_max"]
+                print(f"🕓 Watermark: cargando filas con fecha_inf >= {desde}")
 
+        if modo == "completo" and tabla_existe(tabla_destino):
+            print(f"🗑️ Eliminando tabla {tabla_destino} para recarga completa...")
             with engine.begin() as conn:
-                chunk.to_sql(tabla_destino, conn, if_exists="append", index=False, method='multi')
+                conn.execute(text(f'DROP TABLE "{tabla_destino}";'))
+
+        if desde is not None:
+            crear_indice_clave(tabla_destino)
+            metodo_sql = insertar_upsert
+            metodo = "upsert"
+        else:
+            metodo_sql = resolver_metodo(metodo)
+        print(f"⚙️ Método de carga: {metodo} ({engine.dialect.name})")
+
+        if not tabla_existe(tabla_destino):
+            print(f"🧱 Creando tabla {tabla_destino} con esquema tipado, PK e índices...")
+            crear_tabla_fondos(engine, tabla_destino)
+
+        grupos = row_groups_desde(parquet, columnas, desde)
+        if grupos is not None:
+            total = sum(parquet.metadata.row_group(i).num_rows for i in grupos)
+
+        resumen = {"filas": 0, "fecha_max": desde}
+        cargadas = 0
+        chunks = iterar_chunks(parquet, columnas, chunk_size, originales, desde)
+        chunks = ajustar_a_tabla(chunks, tabla_destino)
+        for n, filas_chunk in cargar_chunks(resumir_chunks(chunks, resumen), tabla_destino, metodo_sql, workers):
+            cargadas += filas_chunk
+            print(f"✅ Chunk {n} insertado: {filas_chunk} filas ({cargadas}/{total})")
+            if al_progresar is not None:
+                al_progresar(cargadas, total, n)
+        filas, fecha_max = resumen["filas"], resumen["fecha_max"]
+
+        if tabla_existe(tabla_destino):
+            actualizar_rollups(engine, tabla_destino, desde)
+
+        # La carga se registra con los rollups ya al día: la API toma este registro como versión de los datos.
+        # También en append: sin registro, los ETag y los cachés de series quedarían con la versión anterior
+        if tabla_existe(tabla_destino):
+            crear_indice_clave(tabla_destino)
+            crear_indice_orden(tabla_destino)
+            registrar_carga(tabla_destino, archivo, hash_contenido, fecha_max, filas)
+            print(f"🕓 Nuevo watermark de {archivo}: {fecha_max} ({filas} filas procesadas)")
 
         with engine.connect() as conn:
             print("🧹 Ejecutando ANALYZE...")
@@ -76,9 +399,18 @@ def procesar_parquet_por_chunks(ruta_parquet=PARQUET_PATH,
             result = conn.execute(text(f'SELECT COUNT(*) FROM "{tabla_destino}";')).scalar()
             print(f"✅ Carga completada. Total de filas en {tabla_destino}: {result}")
 
+        return {"estado": "ok", "filas": cargadas, "fecha_max": fecha_max, "total_tabla": result}
+
+    except IntegrityError as e:
+        mensaje = (f"Filas repetidas en {tabla_destino} (modo {modo}): la PK (run_fm, serie, fecha_inf) "
+                   f"no admite cargar dos veces el mismo día. Usá modo incremental o completo.")
+        print(f"❌ {mensaje}\n{e.orig}")
+        return {"estado": "error", "error": mensaje}
+
     except SQLAlchemyError as e:
         print(f"❌ Error general en procesamiento: {e}")
         traceback.print_exc()
+        return {"estado": "error", "error": str(e)}
 
 if __name__ == "__main__":
-    procesar_parquet_por_chunks()
+    procesar_parquet_por_chunks(modo=os.getenv("ETL_MODO", "incremental"))
@@ -0,0 +1,65 @@
+from sqlalchemy import text, inspect, bindparam, DateTime
+
+# ===============================
+# 📊 Rollups pre-agregados de fondos_mutuos
+# ===============================
+# Diario por fecha × dimensiones de filtro del dashboard
+DIMENSIONES_DIARIO = ["categoria", "categoria_agrupada", "nom_adm", "tipo_fm"]
+MEDIDAS_DIARIO = ["patrimonio_neto_mm", "venta_neta_mm", "aportes_mm", "rescates_mm"]
+
+# Por fondo y mes: el ranking de un rango se arma sumando meses
+DIMENSIONES_FONDO = ["run_fm", "nombre_corto", "nom_adm"]
+MEDIDAS_FONDO = ["venta_neta_mm", "aportes_mm", "rescates_mm"]
+
+# Expresión de "primer día del mes" por motor
+MES_SQL = {
+    "postgresql": "date_trunc('month', {})",
+    "sqlite": "datetime({}, 'start of month')",
+}
+
+def nombre_rollup_diario(tabla):
+    return f"{tabla}_diario"
+
+def nombre_rollup_fondo(tabla):
+    return f"{tabla}_fondo_mes"
+
+def _refrescar(conn, tabla, destino, campo, expr_fecha, dimensiones, medidas, columnas_tabla, desde):
+    dims = [f'"{d}"' for d in dimensiones if d in columnas_tabla]
+    meds = [f'SUM("{m}") AS "{m}"' for m in medidas if m in columnas_tabla]
+    select = ", ".join([f"{expr_fecha.format('fecha_inf')} AS {campo}"] + dims + meds + ["COUNT(*) AS filas"])
+    group_by = ", ".join([expr_fecha.format("fecha_inf")] + dims)
+
+    conn.execute(text(
+        f'CREATE TABLE IF NOT EXISTS "{destino}" AS '
+        f'SELECT {select} FROM "{tabla}" GROUP BY {group_by} LIMIT 0'
+    ))
+
+    if desde is None:
+        conn.execute(text(f'DELETE FROM "{destino}"'))
+        insertar = text(f'INSERT INTO "{destino}" SELECT {select} FROM "{tabla}" GROUP BY {group_by}')
+        return conn.execute(insertar).rowcount
+
+    param = bindparam("desde", type_=DateTime)
+    conn.execute(
+        text(f'DELETE FROM "{destino}" WHERE {campo} >= {expr_fecha.format(":desde")}').bindparams(param),
+        {"desde": desde},
+    )
+    insertar = text(
+        f'INSERT INTO "{destino}" SELECT {select} FROM "{tabla}" '
+        f'WHERE fecha_inf >= {expr_fecha.format(":desde")} GROUP BY {group_by}'
+    ).bindparams(param)
+    return conn.execute(insertar, {"desde": desde}).rowcount
+
+def actualizar_rollups(engine, tabla="fondos_mutuos", desde=None):
+    # desde=None reconstruye todo; con fecha sólo se recalculan los días (y meses) desde ahí
+    columnas_tabla = {c["name"] for c in inspect(engine).get_columns(tabla)}
+    mes = MES_SQL.get(engine.dialect.name, MES_SQL["postgresql"])
+
+    print(f"📊 Actualizando rollups de {tabla} ({'completo' if desde is None else f'desde {desde}'})...")
+    with engine.begin() as conn:
+        filas_diario = _refrescar(conn, tabla, nombre_rollup_diario(tabla), "fecha_inf", "{}",
+                                  DIMENSIONES_DIARIO, MEDIDAS_DIARIO, columnas_tabla, desde)
+        filas_fondo = _refrescar(conn, tabla, nombre_rollup_fondo(tabla), "mes", mes,
+                                 DIMENSIONES_FONDO, MEDIDAS_FONDO, columnas_tabla, desde)
+
+    print(f"✅ Rollups listos: {filas_diario} filas diarias, {filas_fondo} filas fondo×mes")
@@ -0,0 +1,163 @@
+import os
+import sys
+import time
+import subprocess
+import threading
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import (MetaData, Table, Column, Index, Integer, BigInteger, String, Text, DateTime,
+                        select, update)
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from etl.pipeline import engine, procesar_parquet_por_chunks, PARQUET_PATH
+
+# ===============================
+# 🧾 Tabla de jobs del ETL
+# ===============================
+metadata_jobs = MetaData()
+etl_jobs = Table(
+    "etl_jobs", metadata_jobs,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("estado", String(20), nullable=False),  # pendiente | corriendo | ok | sin_cambios | error
+    Column("archivo", String(255)),
+    Column("tabla", String(128)),
+    Column("modo", String(20)),
+    Column("filas_total", BigInteger),
+    Column("filas_cargadas", BigInteger, default=0),
+    Column("chunks", Integer, default=0),
+    Column("iniciado_en", DateTime),
+    Column("actualizado_en", DateTime),
+    Column("terminado_en", DateTime),
+    Column("error", Text),
+)
+# A lo sumo un job "corriendo": la base rechaza el segundo INSERT aunque dos workers arranquen a la vez
+indice_corriendo = Index(
+    "ux_etl_jobs_corriendo", etl_jobs.c.estado, unique=True,
+    postgresql_where=etl_jobs.c.estado == "corriendo", sqlite_where=etl_jobs.c.estado == "corriendo",
+)
+
+# Un job "corriendo" sin actualizaciones por más de esto se considera muerto
+JOB_VENCIDO = timedelta(minutes=int(os.getenv("ETL_JOB_VENCIDO_MIN", "10")))
+# Mientras el worker vive, el job se actualiza al menos con esta frecuencia (también en rollups y ANALYZE)
+LATIDO_SEGUNDOS = max(JOB_VENCIDO.total_seconds() / 4, 1)
+
+# Una vez por proceso: al arrancar la API o el worker
+def asegurar_tabla_jobs():
+    metadata_jobs.create_all(engine, tables=[etl_jobs])
+    vencer_jobs()
+    # create_all no agrega índices a una tabla que ya existía
+    indice_corriendo.create(engine, checkfirst=True)
+
+# Un job que dejó de latir murió con su proceso: se cierra para que no bloquee al siguiente
+def vencer_jobs():
+    ahora = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(
+            update(etl_jobs)
+            .where(etl_jobs.c.estado == "corriendo", etl_jobs.c.actualizado_en < ahora - JOB_VENCIDO)
+            .values(estado="error", terminado_en=ahora, error="Job vencido: el worker dejó de informar avance")
+        )
+
+# Devuelve None si ya hay otro job corriendo
+def crear_job(ruta_parquet, tabla, modo):
+    vencer_jobs()
+    ahora = datetime.now()
+    try:
+        with engine.begin() as conn:
+            resultado = conn.execute(etl_jobs.insert().values(
+                estado="corriendo", archivo=os.path.basename(ruta_parquet), tabla=tabla, modo=modo,
+                filas_cargadas=0, chunks=0, iniciado_en=ahora, actualizado_en=ahora,
+            ))
+            return resultado.inserted_primary_key[0]
+    except IntegrityError:
+        return None
+
+def actualizar_job(job_id, **valores):
+    valores["actualizado_en"] = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(update(etl_jobs).where(etl_jobs.c.id == job_id).values(**valores))
+
+def latir(job_id, detener):
+    while not detener.wait(LATIDO_SEGUNDOS):
+        try:
+            actualizar_job(job_id)
+        except SQLAlchemyError as e:
+            print(f"⚠️ No se pudo actualizar el job #{job_id}: {e}")
+
+def ultimo_job():
+    with engine.connect() as conn:
+        return conn.execute(select(etl_jobs).order_by(etl_jobs.c.id.desc()).limit(1)).mappings().first()
+
+# ===============================
+# 📈 Progreso: filas, ritmo y ETA
+# ===============================
+def describir_job(job):
+    if job is None:
+        return {"estado": "sin_jobs"}
+
+    fin = job["terminado_en"] or datetime.now()
+    segundos = max((fin - job["iniciado_en"]).total_seconds(), 1e-6)
+    filas = job["filas_cargadas"] or 0
+    total = job["filas_total"]
+    filas_por_segundo = filas / segundos
+    eta = None
+    if job["estado"] == "corriendo" and total and filas_por_segundo > 0:
+        eta = round((total - filas) / filas_por_segundo, 1)
+
+    return {
+        "id": job["id"],
+        "estado": job["estado"],
+        "archivo": job["archivo"],
+        "tabla": job["tabla"],
+        "modo": job["modo"],
+        "filas_cargadas": filas,
+        "filas_total": total,
+        "progreso": round(filas / total, 4) if total else None,
+        "chunks": job["chunks"],
+        "chunks_por_minuto": round(job["chunks"] * 60 / segundos, 2),
+        "filas_por_segundo": round(filas_por_segundo, 1),
+        "eta_segundos": eta,
+        "iniciado_en": job["iniciado_en"],
+        "terminado_en": job["terminado_en"],
+        "error": job["error"],
+    }
+
+# ===============================
+# 🏃 Ejecución
+# ===============================
+def ejecutar_job(ruta_parquet=PARQUET_PATH, tabla="fondos_mutuos", modo="incremental"):
+    asegurar_tabla_jobs()
+    job_id = crear_job(ruta_parquet, tabla, modo)
+    if job_id is None:
+        print("⏭️ Ya hay un job del ETL corriendo. No se lanza otro.")
+        return None
+    print(f"🧾 Job ETL #{job_id} iniciado")
+
+    def al_progresar(filas, total, chunks):
+        actualizar_job(job_id, filas_cargadas=filas, filas_total=total, chunks=chunks)
+
+    detener = threading.Event()
+    threading.Thread(target=latir, args=(job_id, detener), daemon=True).start()
+    try:
+        resultado = procesar_parquet_por_chunks(ruta_parquet, tabla, modo=modo, al_progresar=al_progresar)
+        estado = (resultado or {}).get("estado", "error")
+        actualizar_job(job_id, estado=estado, terminado_en=datetime.now(), error=(resultado or {}).get("error"))
+    except Exception as e:
+        traceback.print_exc()
+        actualizar_job(job_id, estado="error", terminado_en=datetime.now(), error=str(e))
+    finally:
+        detener.set()
+    print(f"🧾 Job ETL #{job_id} terminado")
+    return job_id
+
+def lanzar_en_segundo_plano():
+    # Proceso aparte: el ETL no compite por el GIL ni bloquea el arranque de la API.
+    # Sesión propia (las señales de la terminal no lo cortan) y un hilo que lo espera: no queda zombie
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proceso = subprocess.Popen([sys.executable, "-m", "etl.worker"], cwd=backend_dir, start_new_session=True)
+    threading.Thread(target=proceso.wait, daemon=True).start()
+    return proceso
+
+if __name__ == "__main__":
+    inicio = time.time()
+    ejecutar_job(modo=os.getenv("ETL_MODO", "incremental"))
+    print(f"⏱️ Worker terminado en {time.time() - inicio:.1f}s")
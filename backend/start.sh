@@ -1,8 +1,9 @@
 #!/bin/bash
 echo "🚀 Iniciando Dashboard de Fondos Mutuos con Streamlit..."
 
-# 👇 Si querés ejecutar el pipeline manualmente, descomentá la línea siguiente
-# python etl/pipeline.py
+# 👇 Si querés ejecutar el pipeline manualmente, descomentá las líneas siguientes
+# python -m etl.fuentes
+# python -m etl.pipeline
 
 # Levantar Streamlit
 streamlit run dashboard/app.py --server.port $PORT --server.address 0.0.0.0
@@ -0,0 +1,22 @@
+# Pruebas: pip install -r requirements-dev.txt && python -m pytest -q (desde backend/)
+import os
+import sys
+import tempfile
+
+# Base de pruebas: SQLite temporal. etl.pipeline y app.database leen DATABASE_URL al importarse
+DIRECTORIO = tempfile.mkdtemp(prefix="ffmm_pruebas_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRECTORIO, 'ffmm.db')}"
+os.environ.pop("DATABASE_PUBLIC_URL", None)
+os.environ.pop("DATABASE_ASYNC_URL", None)
+os.environ["ETL_EN_STARTUP"] = "0"
+os.environ["FFMM_DATA_DIR"] = DIRECTORIO
+os.environ["DASHBOARD_BACKEND"] = "pandas"
+os.environ["INSIGHT_CLIENTE"] = "local"
+os.environ["INSIGHT_CACHE_DISCO"] = "0"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# Los módulos del dashboard se importan entre sí por nombre (como los corre streamlit). "app" de la API
+# es un paquete de espacio de nombres y dashboard/app.py le ganaría: se importa antes de sumar dashboard/
+import app  # noqa: E402,F401
+sys.path.append(os.path.join(BACKEND_DIR, "dashboard"))
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+import datos
+from agregados import cubo_diario, lttb, reducir_serie
+from etl.benchmark import generar_sintetico
+from filtros import aplicar_filtros, clave_filtro
+
+def serie_diaria(dias, inicio="2024-01-01", valores=None):
+    indice = pd.date_range(inicio, periods=dias, freq="D")
+    return pd.Series(np.arange(dias, dtype=float) if valores is None else valores, index=indice)
+
+# ===============================
+# 📉 LTTB
+# ===============================
+def test_lttb_respeta_umbral_y_extremos():
+    serie = serie_diaria(1000, valores=np.sin(np.arange(1000) / 20.0))
+    reducida = lttb(serie, 100)
+    assert len(reducida) == 100
+    assert reducida.index[0] == serie.index[0]
+    assert reducida.index[-1] == serie.index[-1]
+    assert reducida.index.is_monotonic_increasing
+    assert reducida.isin(serie).all()
+
+def test_lttb_conserva_picos():
+    valores = np.zeros(500)
+    valores[123], valores[377] = 50.0, -80.0
+    reducida = lttb(serie_diaria(500, valores=valores), 20)
+    assert reducida.max() == 50.0
+    assert reducida.min() == -80.0
+
+def test_lttb_sin_cambios_si_no_hace_falta():
+    serie = serie_diaria(10)
+    assert lttb(serie, 10) is serie
+    assert lttb(serie, 50) is serie
+    assert lttb(serie, 2) is serie
+
+# ===============================
+# 🔽 reducir_serie
+# ===============================
+def test_diaria_si_cabe_en_el_presupuesto():
+    serie = serie_diaria(300)
+    reducida, resolucion = reducir_serie(serie, presupuesto=400)
+    assert resolucion == "diaria"
+    assert reducida.equals(serie)
+
+def test_semanal_suma_los_flujos():
+    serie = serie_diaria(700, valores=np.ones(700))
+    reducida, resolucion = reducir_serie(serie, "suma", presupuesto=400)
+    assert resolucion == "semanal"
+    assert len(reducida) <= 400
+    assert reducida.sum() == serie.sum()
+
+def test_ultimo_toma_el_cierre_del_periodo():
+    serie = serie_diaria(700)
+    reducida, resolucion = reducir_serie(serie, "ultimo", presupuesto=400)
+    assert resolucion == "semanal"
+    assert reducida.iloc[-1] == serie.iloc[-1]
+    # Cada semana cerrada termina en domingo: su valor es el de ese día
+    assert reducida.iloc[0] == serie.loc[reducida.index[0]]
+
+def test_mensual_y_lttb_si_sigue_sin_caber():
+    serie = serie_diaria(3650)
+    reducida, resolucion = reducir_serie(serie, "ultimo", presupuesto=50)
+    assert resolucion == "mensual (LTTB)"
+    assert len(reducida) == 50
+    assert reducida.iloc[-1] == serie.iloc[-1]
+
+def test_serie_vacia():
+    vacia = pd.Series([], index=pd.DatetimeIndex([]), dtype=float)
+    reducida, resolucion = reducir_serie(vacia)
+    assert reducida.empty
+    assert resolucion == "diaria"
+
+# ===============================
+# 🧊 Cubo diario
+# ===============================
+@pytest.fixture
+def base_sintetica(tmp_path, monkeypatch):
+    ruta = tmp_path / "ffmm_merged.parquet"
+    generar_sintetico(str(ruta), filas=60 * 3 * 30, fondos=60)
+    monkeypatch.setattr(datos, "PARQUET_PATH", str(ruta))
+    monkeypatch.setattr(datos, "DATASET_PATH", str(tmp_path / "sin_dataset"))
+    base = datos.a_pandas(datos.leer_tabla().sort_by("fecha_inf_date"))
+    base.attrs["firma"] = f"prueba-{tmp_path.name}"
+    return base, pd.read_parquet(ruta)
+
+# La base puede bajar montos a float32, pero el cubo no se aleja de sumar el origen en float64
+@pytest.mark.parametrize("selecciones", [{}, {"nom_adm": ("BCI",)}, {"serie": ("A", "B")}])
+def test_cubo_igual_al_origen_en_float64(base_sintetica, selecciones):
+    base, origen = base_sintetica
+    clave = clave_filtro(selecciones, ("2010-01-01", "2010-12-31"))
+    cubo = cubo_diario(base, aplicar_filtros(base, clave), clave)
+
+    for col, valores in selecciones.items():
+        origen = origen[origen[col].isin(valores)]
+    esperado = origen.groupby("fecha_inf")[datos.COLUMNAS_MM].sum()
+    assert len(cubo) == len(esperado) == 30
+    for col in datos.COLUMNAS_MM:
+        np.testing.assert_allclose(cubo[col].to_numpy(), esperado[col].to_numpy(), rtol=datos.RTOL_SUMAS)
+
+def test_float32_solo_con_un_signo(base_sintetica):
+    base, _ = base_sintetica
+    assert base["aportes_mm"].dtype == np.float32
+    assert base["venta_neta_mm"].dtype == np.float64
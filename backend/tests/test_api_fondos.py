@@ -0,0 +1,127 @@
+from datetime import date
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from etl import pipeline
+from etl.esquema import crear_tabla_fondos, tabla_fondos_mutuos
+from app.main import app
+from app.services.fondos_service import codificar_cursor, decodificar_cursor
+
+FECHAS = [date(2025, 7, 1), date(2025, 7, 2), date(2025, 7, 3)]
+FONDOS = {8001: "BCI", 8002: "SURA"}
+SERIES = ["A", "B"]
+
+def fila(fecha, run_fm, serie):
+    return {
+        "fecha_inf": fecha, "run_fm": run_fm, "serie": serie, "nombre_corto": f"FONDO {run_fm}",
+        "run_fm_nombrecorto": f"{run_fm} - FONDO {run_fm}", "nom_adm": FONDOS[run_fm],
+        "categoria": "Accionario Nacional", "categoria_agrupada": "Accionario", "tipo_fm": "Mixto",
+        "patrimonio_neto_mm": 100.0, "aportes_mm": 2.0, "rescates_mm": 1.0, "venta_neta_mm": 1.0,
+    }
+
+FILAS = [fila(f, r, s) for f in FECHAS for r in FONDOS for s in SERIES]
+
+@pytest.fixture(scope="module")
+def cliente():
+    crear_tabla_fondos(pipeline.engine)
+    pipeline.metadata_etl.create_all(pipeline.engine, tables=[pipeline.etl_cargas])
+    with pipeline.engine.begin() as conn:
+        conn.execute(delete(tabla_fondos_mutuos))
+        conn.execute(tabla_fondos_mutuos.insert(), FILAS)
+    pipeline.registrar_carga("fondos_mutuos", "prueba.parquet", "hash-1", FECHAS[-1], len(FILAS))
+    with TestClient(app) as c:
+        yield c
+
+def clave(f):
+    return f["fecha_inf"], f["run_fm"], f["serie"]
+
+# ===============================
+# 📑 Cursor
+# ===============================
+def test_cursor_ida_y_vuelta():
+    cursor = codificar_cursor({"fecha_inf": date(2025, 7, 2), "run_fm": 8001, "serie": "B"})
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == (date(2025, 7, 2), 8001, "B")
+
+@pytest.mark.parametrize("cursor", ["no-es-un-cursor", "", "WzFd"])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError):
+        decodificar_cursor(cursor)
+
+def test_cursor_invalido_responde_400(cliente):
+    assert cliente.get("/fondos/", params={"cursor": "no-es-un-cursor"}).status_code == 400
+
+def test_paginacion_recorre_todo_sin_repetir(cliente):
+    vistas, cursor, paginas = [], None, 0
+    while True:
+        params = {"limite": 5} | ({"cursor": cursor} if cursor else {})
+        cuerpo = cliente.get("/fondos/", params=params).json()
+        vistas += [clave(f) for f in cuerpo["fondos"]]
+        paginas += 1
+        cursor = cuerpo["siguiente"]
+        if cursor is None:
+            break
+    esperadas = sorted((f["fecha_inf"].isoformat(), f["run_fm"], f["serie"]) for f in FILAS)
+    assert vistas == esperadas
+    assert paginas == 3
+
+def test_pagina_exacta_no_deja_cursor(cliente):
+    cuerpo = cliente.get("/fondos/", params={"limite": len(FILAS)}).json()
+    assert len(cuerpo["fondos"]) == len(FILAS)
+    assert cuerpo["siguiente"] is None
+
+# ===============================
+# 🔎 Filtros
+# ===============================
+def test_filtro_por_administradora(cliente):
+    fondos = cliente.get("/fondos/", params={"nom_adm": "BCI"}).json()["fondos"]
+    assert len(fondos) == len(FECHAS) * len(SERIES)
+    assert {f["nom_adm"] for f in fondos} == {"BCI"}
+
+def test_filtros_repetibles_y_fechas(cliente):
+    params = {"run_fm": [8001, 8002], "serie": "A", "desde": "2025-07-02", "hasta": "2025-07-02"}
+    fondos = cliente.get("/fondos/", params=params).json()["fondos"]
+    assert [clave(f) for f in fondos] == [("2025-07-02", 8001, "A"), ("2025-07-02", 8002, "A")]
+
+# ===============================
+# 🏷️ ETag / 304
+# ===============================
+def test_etag_y_304(cliente):
+    params = {"nom_adm": "SURA", "limite": 2}
+    r = cliente.get("/fondos/", params=params)
+    etag = r.headers["ETag"]
+    assert r.status_code == 200
+
+    r = cliente.get("/fondos/", params=params, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert cliente.get("/fondos/", params=params, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    # Otros parámetros, otro ETag
+    assert cliente.get("/fondos/", params={"nom_adm": "BCI", "limite": 2}).headers["ETag"] != etag
+
+    # Una carga nueva cambia la versión de los datos: el ETag viejo deja de servir
+    pipeline.registrar_carga("fondos_mutuos", "prueba.parquet", "hash-2", FECHAS[-1], 0)
+    r = cliente.get("/fondos/", params=params, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+
+# ===============================
+# 📈 Series
+# ===============================
+# El catálogo se consulta una vez por versión de datos, no en cada fallo de caché
+def test_series_consulta_el_catalogo_una_vez(cliente, monkeypatch):
+    from app.routes.series import cache_series
+    from app.services import series_service
+    llamadas = []
+    inspeccionar = series_service.inspect
+    monkeypatch.setattr(series_service, "inspect", lambda c: llamadas.append(c) or inspeccionar(c))
+    cache_series.limpiar()
+
+    for adm in FONDOS.values():
+        r = cliente.get("/series/venta_neta", params={"nom_adm": adm})
+        assert r.status_code == 200
+        assert r.headers["X-Cache"] == "MISS"
+        assert r.json()["valores"] == [2.0, 2.0, 2.0]
+    assert cliente.get("/series/aportes").json()["valores"] == [8.0, 8.0, 8.0]
+    assert len(llamadas) == 1
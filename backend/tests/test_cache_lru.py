@@ -0,0 +1,57 @@
+import pytest
+from app.services import cache as modulo_cache
+from app.services.cache import CacheLRU
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def __call__(self):
+        return self.ahora
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(modulo_cache.time, "monotonic", reloj)
+    return reloj
+
+def test_vence_por_ttl(reloj):
+    cache = CacheLRU(max_entradas=10, ttl=60)
+    cache.guardar("a", 1)
+    reloj.ahora += 60
+    assert cache.obtener("a") == 1
+    reloj.ahora += 1
+    assert cache.obtener("a") is None
+    assert len(cache) == 0
+
+def test_desaloja_la_menos_usada(reloj):
+    cache = CacheLRU(max_entradas=2, ttl=60)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == 1  # "b" pasa a ser la menos usada
+    cache.guardar("c", 3)
+    assert cache.obtener("b") is None
+    assert cache.obtener("a") == 1
+    assert cache.obtener("c") == 3
+    assert len(cache) == 2
+
+def test_guardar_de_nuevo_renueva_ttl(reloj):
+    cache = CacheLRU(max_entradas=10, ttl=60)
+    cache.guardar("a", 1)
+    reloj.ahora += 50
+    cache.guardar("a", 2)
+    reloj.ahora += 50
+    assert cache.obtener("a") == 2
+
+def test_version_nueva_limpia(reloj):
+    cache = CacheLRU(max_entradas=10, ttl=60, intervalo_version=10)
+    assert cache.version_vencida()
+    cache.fijar_version("1:2025-07-01")
+    cache.guardar("a", 1)
+    assert not cache.version_vencida()
+    cache.fijar_version("1:2025-07-01")
+    assert cache.obtener("a") == 1
+    reloj.ahora += 10
+    assert cache.version_vencida()
+    cache.fijar_version("2:2025-07-02")
+    assert cache.obtener("a") is None
@@ -0,0 +1,39 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import datos
+import exportar
+from etl.benchmark import generar_sintetico
+
+@pytest.fixture
+def parquet_antiguo(tmp_path, monkeypatch):
+    # Parquet previo a run_fm_nombrecorto: la columna la arma el dashboard al cargar
+    ruta = tmp_path / "ffmm_merged.parquet"
+    generar_sintetico(str(ruta), filas=720, fondos=20, filas_por_grupo=180)
+    pq.write_table(pq.read_table(ruta).drop_columns(["run_fm_nombrecorto"]), ruta)
+    monkeypatch.setattr(datos, "PARQUET_PATH", str(ruta))
+    monkeypatch.setattr(datos, "DATASET_PATH", str(tmp_path / "sin_dataset"))
+    return ruta
+
+# generar_sintetico parte el 2010-01-01: 20 fondos × 3 series × 12 días
+RANGO = (pd.Timestamp("2010-01-01"), pd.Timestamp("2010-01-31"))
+
+def filas_exportadas(clave):
+    return sum(lote.num_rows for lote in exportar.lotes_dataset(clave))
+
+def test_filtro_de_fondo_sin_columna_derivada(parquet_antiguo):
+    fondo = "8003 - FONDO SINTETICO 8003"
+    clave = ((("run_fm_nombrecorto", (fondo,)),), RANGO)
+    lotes = list(exportar.lotes_dataset(clave))
+    runs = {r for lote in lotes for r in lote.column("run_fm").to_pylist()}
+    assert runs == {8003}
+    assert sum(lote.num_rows for lote in lotes) == 36
+
+def test_filtro_sobre_columna_inexistente(parquet_antiguo):
+    clave = ((("no_existe", ("x",)),), RANGO)
+    with pytest.raises(ValueError, match="no_existe"):
+        filas_exportadas(clave)
+
+def test_exportacion_sobre_el_tope(parquet_antiguo):
+    with pytest.raises(ValueError, match="máximo"):
+        exportar.exportar_lotes(exportar.lotes_dataset(((), RANGO)), "CSV", max_filas=100)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+from filtros import TODO, clave_filtro, mascara_columna, normalizar_seleccion
+
+UNIVERSO = ["BCI", "SURA", "ZURICH"]
+
+def test_seleccionar_todo_no_filtra():
+    assert normalizar_seleccion([TODO], UNIVERSO) is None
+
+def test_todo_con_otros_valores_filtra_por_esos():
+    assert normalizar_seleccion([TODO, "SURA"], UNIVERSO) == ("SURA",)
+
+def test_valores_ordenados_y_sin_repetir():
+    assert normalizar_seleccion(["SURA", "BCI", "SURA"], UNIVERSO) == ("BCI", "SURA")
+
+def test_todo_el_universo_no_filtra():
+    assert normalizar_seleccion(["ZURICH", "BCI", "SURA"], UNIVERSO) is None
+
+def test_seleccion_vacia():
+    # Vacía en un filtro principal: ninguna fila; en uno opcional: sin predicado
+    assert normalizar_seleccion([], UNIVERSO) == ()
+    assert normalizar_seleccion(None, UNIVERSO) == ()
+    assert normalizar_seleccion([], UNIVERSO, vacio_filtra=False) is None
+
+def test_clave_canonica():
+    rango = ("2025-07-01", "2025-07-31")
+    a = clave_filtro({"serie": ("A",), "nom_adm": ("BCI", "SURA"), "tipo_fm": None}, rango)
+    b = clave_filtro({"nom_adm": ("BCI", "SURA"), "serie": ("A",)}, (pd.Timestamp(rango[0]), pd.Timestamp(rango[1])))
+    assert a == b
+    assert hash(a) == hash(b)
+    assert a == ((("nom_adm", ("BCI", "SURA")), ("serie", ("A",))),
+                 (pd.Timestamp("2025-07-01"), pd.Timestamp("2025-07-31")))
+
+def test_clave_distingue_rango_y_valores():
+    rango = ("2025-07-01", "2025-07-31")
+    base = clave_filtro({"serie": ("A",)}, rango)
+    assert clave_filtro({"serie": ("B",)}, rango) != base
+    assert clave_filtro({"serie": ("A",)}, ("2025-07-01", "2025-07-30")) != base
+    assert clave_filtro({"serie": ()}, rango) != clave_filtro({}, rango)
+
+def test_mascara_por_codigos():
+    columna = pd.Series(["BCI", "SURA", None, "ZURICH", "BCI"], dtype="category")
+    mascara = mascara_columna(columna, ("BCI", "NO_EXISTE"), slice(0, 5))
+    assert mascara.tolist() == [True, False, False, False, True]
+    assert mascara_columna(columna, ("SURA",), slice(1, 3)).tolist() == [True, False]
+    assert not mascara_columna(columna, (), slice(0, 5)).any()
+    assert mascara.dtype == np.bool_
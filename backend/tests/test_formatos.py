@@ -0,0 +1,27 @@
+import pytest
+from app.services.formatos import negociar_formato
+
+ARROW = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+@pytest.mark.parametrize("accept, esperado", [
+    (None, "json"),
+    ("", "json"),
+    (ARROW, "arrow"),
+    (f"{ARROW};q=0.1, application/json", "json"),
+    (f"application/json;q=0.5, {PARQUET};q=0.9", "parquet"),
+    (f"{ARROW}, {PARQUET}", "arrow"),
+    (f"*/*, {PARQUET}", "parquet"),
+    (f"*/*;q=0.8, {ARROW};q=0.5", "json"),
+    (f"{ARROW};q=0, application/x-parquet", "parquet"),
+    (f"{ARROW};q=0", "json"),
+    ("text/html, application/xhtml+xml", "json"),
+    (f"{ARROW};q=abc, application/json;q=0.2", "json"),
+])
+def test_negociacion_por_calidad(accept, esperado):
+    assert negociar_formato(accept) == esperado
+
+def test_formato_explicito_gana():
+    assert negociar_formato(ARROW, "parquet") == "parquet"
+    with pytest.raises(ValueError):
+        negociar_formato(None, "xlsx")
@@ -0,0 +1,116 @@
+import json
+import os
+import pytest
+import insight
+from insight import CacheRespuestas, ClienteLocal, ClienteOpenAI, FaltaClave
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1_700_000_000.0
+
+    def __call__(self):
+        return self.ahora
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(insight.time, "time", reloj)
+    return reloj
+
+# ===============================
+# 🗃️ CacheRespuestas
+# ===============================
+def test_lru_en_memoria(reloj):
+    cache = CacheRespuestas(max_entradas=2, ttl=60)
+    cache.guardar("a", "uno")
+    cache.guardar("b", "dos")
+    assert cache.obtener("a") == "uno"  # "b" pasa a ser la menos usada
+    cache.guardar("c", "tres")
+    assert cache.obtener("b") is None
+    assert cache.obtener("a") == "uno"
+    assert cache.obtener("c") == "tres"
+
+def test_ttl_en_memoria(reloj):
+    cache = CacheRespuestas(max_entradas=10, ttl=60)
+    cache.guardar("a", "uno")
+    reloj.ahora += 60
+    assert cache.obtener("a") == "uno"
+    reloj.ahora += 1
+    assert cache.obtener("a") is None
+
+def test_persiste_en_disco(reloj, tmp_path):
+    CacheRespuestas(max_entradas=10, ttl=60, directorio=str(tmp_path)).guardar("a", "uno ñandú")
+    assert [p.name for p in tmp_path.iterdir()] == ["a.json"]
+
+    # Otra instancia (reinicio u otra réplica) la lee del disco y la deja en memoria
+    otra = CacheRespuestas(max_entradas=10, ttl=60, directorio=str(tmp_path))
+    assert otra.obtener("a") == "uno ñandú"
+    os.remove(tmp_path / "a.json")
+    assert otra.obtener("a") == "uno ñandú"
+
+def test_disco_vencido_se_borra(reloj, tmp_path):
+    CacheRespuestas(max_entradas=10, ttl=60, directorio=str(tmp_path)).guardar("a", "uno")
+    reloj.ahora += 61
+    assert CacheRespuestas(max_entradas=10, ttl=60, directorio=str(tmp_path)).obtener("a") is None
+    assert not (tmp_path / "a.json").exists()
+
+def test_disco_corrupto_es_un_fallo(reloj, tmp_path):
+    (tmp_path / "a.json").write_text("{no es json", encoding="utf-8")
+    assert CacheRespuestas(max_entradas=10, ttl=60, directorio=str(tmp_path)).obtener("a") is None
+
+def test_archivo_en_disco(reloj, tmp_path):
+    CacheRespuestas(max_entradas=10, ttl=60, directorio=str(tmp_path)).guardar("a", "uno")
+    guardado = json.loads((tmp_path / "a.json").read_text(encoding="utf-8"))
+    assert guardado == {"creado": reloj.ahora, "texto": "uno"}
+    assert not [p for p in tmp_path.iterdir() if p.suffix == ".tmp"]
+
+# ===============================
+# 🤖 Selección de cliente
+# ===============================
+def test_cliente_local_no_pide_clave(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert isinstance(insight.obtener_cliente("local"), ClienteLocal)
+
+def test_cliente_desconocido():
+    with pytest.raises(ValueError, match="INSIGHT_CLIENTE no soportado"):
+        insight.obtener_cliente("otro")
+
+def test_openai_sin_clave(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    with pytest.raises(FaltaClave):
+        insight.obtener_cliente("openai")
+
+def test_openai_un_cliente_por_clave(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-prueba-1")
+    primero = insight.obtener_cliente("openai")
+    assert isinstance(primero, ClienteOpenAI)
+    assert insight.obtener_cliente("openai") is primero
+
+    # Clave rotada: cliente nuevo, no el de la clave vieja
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-prueba-2")
+    segundo = insight.obtener_cliente("openai")
+    assert segundo is not primero
+    assert segundo._cliente.api_key == "sk-prueba-2"
+
+# ===============================
+# 💬 responder: el acierto de caché no llama al cliente
+# ===============================
+class ClienteContador(ClienteLocal):
+    def __init__(self):
+        self.llamadas = 0
+
+    def stream(self, modelo, mensajes, max_tokens=800):
+        self.llamadas += 1
+        yield from super().stream(modelo, mensajes, max_tokens)
+
+def test_responder_usa_la_cache():
+    cliente = ClienteContador()
+    mensajes = [{"role": "user", "content": "¿Qué fondo tuvo más aportes? (test_responder_usa_la_cache)"}]
+    primera = list(insight.responder(mensajes, cliente, modelo="prueba"))
+    assert len(primera) > 1  # en trozos
+    segunda = list(insight.responder(mensajes, cliente, modelo="prueba"))
+    assert segunda == ["".join(primera)]
+    assert cliente.llamadas == 1
+    # Otro max_tokens es otra respuesta
+    list(insight.responder(mensajes, cliente, modelo="prueba", max_tokens=100))
+    assert cliente.llamadas == 2
@@ -0,0 +1,10 @@
+import motor_postgres
+from etl import pipeline
+from etl.esquema import crear_tabla_fondos
+
+# Tabla recién creada, sin cargas: MIN/MAX vienen NULL y no hay rango que mostrar
+def test_rango_con_tabla_vacia(monkeypatch):
+    crear_tabla_fondos(pipeline.engine, "fondos_vacia")
+    monkeypatch.setattr(motor_postgres, "TABLA", "fondos_vacia")
+    monkeypatch.setattr(motor_postgres, "ROLLUP_DIARIO", "fondos_vacia_sin_rollup")
+    assert motor_postgres.rango() is None
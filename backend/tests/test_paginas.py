@@ -0,0 +1,67 @@
+import os
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+from etl.benchmark import generar_sintetico
+
+DASHBOARD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dashboard")
+PAGINAS = sorted(f"pages/{p}" for p in os.listdir(os.path.join(DASHBOARD_DIR, "pages")) if p.endswith(".py"))
+
+# Parquet sintético en FFMM_DATA_DIR (conftest): 40 fondos × 3 series × 90 días
+@pytest.fixture(scope="module", autouse=True)
+def dataset():
+    ruta = os.path.join(os.environ["FFMM_DATA_DIR"], "ffmm_merged.parquet")
+    if not os.path.exists(ruta):
+        generar_sintetico(ruta, filas=40 * 3 * 90, fondos=40)
+    return ruta
+
+def sesion_filtrada():
+    at = AppTest.from_file(os.path.join(DASHBOARD_DIR, "app.py"), default_timeout=60)
+    at.run()
+    assert not at.exception
+    next(b for b in at.button if "Aplicar filtros" in b.label).click()
+    at.run()
+    assert not at.exception
+    return at
+
+def test_aplicar_filtros():
+    at = sesion_filtrada()
+    assert any("10,800 filas" in s.value for s in at.success)
+
+@pytest.mark.parametrize("pagina", PAGINAS)
+def test_paginas_sin_errores(pagina):
+    at = sesion_filtrada()
+    at.switch_page(pagina)
+    at.run()
+    assert not at.exception, [e.value for e in at.exception]
+
+# Las sesiones guardan claves de filtro, no DataFrames: la base es una sola por proceso
+def test_sesiones_sin_dataframes():
+    for at in [sesion_filtrada() for _ in range(3)]:
+        assert "df" not in at.session_state
+        assert isinstance(at.session_state["clave_filtro"], tuple)
+
+def test_insight_con_cliente_local():
+    at = sesion_filtrada()
+    at.switch_page("pages/06_InsightIA.py")
+    at.run()
+    next(b for b in at.button if b.label == "Generar Insight IA").click()
+    at.run()
+    assert not at.exception
+    assert any("Respuesta local de prueba" in s.value for s in at.success)
+
+    at.chat_input[0].set_value("¿Qué administradora domina?")
+    at.run()
+    assert not at.exception
+    assert any("administradora domina" in m.markdown[0].value for m in at.chat_message if m.markdown)
+
+# Sobre el tope de filas no se ofrece la descarga (se serviría completa desde memoria)
+def test_descarga_con_tope_de_filas(monkeypatch):
+    import exportar
+    monkeypatch.setattr(exportar, "MAX_FILAS_EXPORTACION", 1000)
+    at = sesion_filtrada()
+    at.switch_page("pages/05_ListadoFondos.py")
+    at.run()
+    assert not at.exception
+    assert any("hasta 1,000 filas" in w.value for w in at.warning)
+    assert not at.get("download_button")
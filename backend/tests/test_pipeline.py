@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from etl import pipeline
+from etl.benchmark import generar_sintetico
+from etl.rollups import nombre_rollup_diario
+
+MEDIDAS = ["patrimonio_neto_mm", "venta_neta_mm", "aportes_mm", "rescates_mm"]
+CLAVE = ["fecha_inf", "run_fm", "serie"]
+
+@pytest.fixture
+def parquet(tmp_path):
+    ruta = tmp_path / "ffmm_merged.parquet"
+    # 20 fondos × 3 series × 12 días, en row groups chicos para que haya varios chunks
+    generar_sintetico(str(ruta), filas=720, fondos=20, filas_por_grupo=180)
+    return str(ruta)
+
+def leer(tabla):
+    with pipeline.engine.connect() as conn:
+        df = pd.read_sql_query(f'SELECT * FROM "{tabla}"', conn)
+    df["fecha_inf"] = pd.to_datetime(df["fecha_inf"])
+    return df
+
+# Lo que entra por el parquet sale igual de SQLite (ida y vuelta completa del ETL)
+@pytest.mark.parametrize("metodo", ["multi", "copy"])
+def test_ida_y_vuelta_sqlite(parquet, metodo):
+    tabla = f"ida_vuelta_{metodo}"
+    resultado = pipeline.procesar_parquet_por_chunks(parquet, tabla, chunk_size=100, metodo=metodo,
+                                                     modo="completo")
+    assert resultado["estado"] == "ok"
+    assert resultado["filas"] == resultado["total_tabla"] == 720
+
+    origen = pd.read_parquet(parquet).sort_values(CLAVE, ignore_index=True)
+    cargado = leer(tabla).sort_values(CLAVE, ignore_index=True)
+    assert len(cargado) == len(origen)
+    for col in CLAVE + ["nombre_corto", "run_fm_nombrecorto", "nom_adm", "categoria", "categoria_agrupada",
+                        "tipo_fm"]:
+        assert cargado[col].astype(origen[col].dtype).equals(origen[col]), col
+    np.testing.assert_allclose(cargado[MEDIDAS].to_numpy(), origen[MEDIDAS].to_numpy(), rtol=1e-12)
+
+    # Rollup diario: mismas sumas por día que la tabla base
+    diario = leer(nombre_rollup_diario(tabla)).groupby("fecha_inf")[MEDIDAS].sum()
+    esperado = origen.groupby("fecha_inf")[MEDIDAS].sum()
+    np.testing.assert_allclose(diario[MEDIDAS].to_numpy(), esperado.to_numpy(), rtol=1e-9)
+
+def test_segunda_corrida_sin_cambios(parquet):
+    tabla = "ida_vuelta_repetida"
+    assert pipeline.procesar_parquet_por_chunks(parquet, tabla)["estado"] == "ok"
+    assert pipeline.procesar_parquet_por_chunks(parquet, tabla) == {"estado": "sin_cambios", "filas": 0}
+    assert len(leer(tabla)) == 720
+
+# Toda carga queda en etl_cargas (de ahí sale la versión de los datos para ETag y cachés)
+def test_append_registra_la_carga(parquet, tmp_path):
+    tabla = "carga_append"
+    assert pipeline.procesar_parquet_por_chunks(parquet, tabla, modo="completo")["estado"] == "ok"
+    antes = pipeline.ultima_carga(tabla, "ffmm_merged.parquet")
+
+    # Días siguientes, mismo nombre de archivo (como lo deja el scraper)
+    (tmp_path / "nuevo").mkdir()
+    otro = tmp_path / "nuevo" / "ffmm_merged.parquet"
+    generar_sintetico(str(otro), filas=720, fondos=20, seed=1)
+    origen = pd.read_parquet(otro)
+    origen["fecha_inf"] += pd.Timedelta(days=30)
+    origen.to_parquet(otro, index=False)
+    assert pipeline.procesar_parquet_por_chunks(str(otro), tabla, modo="append")["estado"] == "ok"
+
+    despues = pipeline.ultima_carga(tabla, "ffmm_merged.parquet")
+    assert despues["id"] > antes["id"]
+    assert despues["filas"] == 720
+    assert pd.Timestamp(despues["fecha_max"]) == origen["fecha_inf"].max()
+    assert len(leer(tabla)) == 1440